@@ -4,7 +4,9 @@ import streamlit as st
 
 # %%
 import message
-import notion_handler
+import diff_filter
+import metrics
+import notion_outbox
 
 # %%
 # 페이지 제목 
@@ -17,12 +19,27 @@ st.write("아래에 필요한 정보를 입력해 주세요.")
 st.header("1. GitHub 정보")
 github_owner = st.text_input("GitHub ID (Owner)", placeholder="예: 'human1234'")
 github_repo = st.text_input("GitHub repository", placeholder="예: 'TensorFlow'")
-commit_hash = st.text_input("특정 커밋 해시 (Commit Hash)", placeholder="업데이트를 확인할 commit의 해시를 입력하세요.")
+mode = st.radio("요약 대상", ["단일 커밋", "커밋 범위 (base...head)", "기간 백필"], horizontal=True)
+commit_hash = base_hash = head_hash = branch = None
+since_date = until_date = None
+if mode == "단일 커밋":
+    commit_hash = st.text_input("특정 커밋 해시 (Commit Hash)", placeholder="업데이트를 확인할 commit의 해시를 입력하세요.")
+elif mode == "커밋 범위 (base...head)":
+    base_hash = st.text_input("시작 커밋 (base)", placeholder="이 커밋 이후부터 요약합니다.")
+    head_hash = st.text_input("끝 커밋 (head)", placeholder="예: 커밋 해시 또는 브랜치 이름")
+else:
+    since_date = st.date_input("시작일", value=None)
+    until_date = st.date_input("종료일", value=None)
+    branch = st.text_input("브랜치 (선택)", placeholder="비워두면 기본 브랜치")
 github_token = st.text_input("GitHub 개인 액세스 토큰 (Token)", type="password", help="리포지토리 접근 권한이 있는 토큰을 입력하세요.")
+make_infographic = st.checkbox("📊 카드형 인포그래픽도 함께 만들기", help="요약과 같은 변경 내역으로 인포그래픽 HTML을 동시에 생성합니다. (추가 대기 시간 거의 없음)")
 
 st.header("2. Notion 정보")
 notion_page_url = st.text_input("Notion 페이지 URL", placeholder="내용을 추가할 Notion 페이지의 전체 URL을 입력하세요.")
 notion_token = st.text_input("Notion 개인 액세스 토큰 (Token)", type="password", help="토큰을 입력하세요.")
+# 앱이 재시작되어 멈춰 있던 이 토큰의 전송 작업이 있으면 이어서 보냄 (토큰은 메모리에만 보관)
+if notion_token:
+    notion_outbox.get_outbox().register_token(notion_token)
 
 # %%
 # --- 실행 버튼 ---
@@ -32,6 +49,11 @@ st.write("---")
 # 'summary'라는 기억 공간이 없으면 만들어 둡니다.
 if 'summary' not in st.session_state:
     st.session_state.summary = None
+if 'infographic' not in st.session_state:
+    st.session_state.infographic = None
+# 단계별 소요 시간 기록 (사이드바 패널에서 표시)
+if 'timings' not in st.session_state:
+    st.session_state.timings = {}
 
 
 
@@ -40,29 +62,82 @@ if 'summary' not in st.session_state:
 # 1. 미리보기가 생성되지 않은 경우 (초기 화면)
 if st.session_state.summary is None:
     if st.button("Notion에 요약본 작성하기", icon="🔎"):
-        if github_owner and github_repo and commit_hash and github_token:
-            with st.spinner("GitHub에서 커밋 변경 내역을 가져오는 중..."):
-                commit_changes = message.get_commit_changes(
-                    owner=github_owner, repo=github_repo, commit_hash=commit_hash, github_token=github_token
-                )
+        if mode == "단일 커밋":
+            target_ready = bool(commit_hash)
+        elif mode == "커밋 범위 (base...head)":
+            target_ready = bool(base_hash and head_hash)
+        else:
+            target_ready = bool(since_date or until_date)
+
+        if github_owner and github_repo and target_ready and github_token:
+            # ⏱️ GitHub 조회 → 필터링 → 프롬프트 → LLM 단계별 시간/토큰 기록
+            with metrics.start_run("요약 생성", repo=f"{github_owner}/{github_repo}") as run:
+                with st.spinner("GitHub에서 커밋 변경 내역을 가져오는 중..."):
+                    if mode == "단일 커밋":
+                        # main, v1.0 같은 ref도 받을 수 있으므로 캐시 키로 쓸 실제 커밋 SHA를 먼저 확인
+                        commit_hash = message.resolve_commit_sha(
+                            owner=github_owner, repo=github_repo, ref=commit_hash, github_token=github_token
+                        )
+                        commit_changes = commit_hash and message.get_commit_changes(
+                            owner=github_owner, repo=github_repo, commit_hash=commit_hash, github_token=github_token
+                        )
+                        st.session_state.title = f"Commit 요약 ({(commit_hash or '')[:7]})"
+                    elif mode == "커밋 범위 (base...head)":
+                        commit_changes = message.get_range_changes(
+                            owner=github_owner, repo=github_repo, github_token=github_token,
+                            base=base_hash, head=head_hash
+                        )
+                        st.session_state.title = f"Commit 요약 ({base_hash[:7]}...{head_hash[:7]})"
+                    else:
+                        commit_changes = message.get_range_changes(
+                            owner=github_owner, repo=github_repo, github_token=github_token,
+                            since=f"{since_date.isoformat()}T00:00:00Z" if since_date else None,
+                            until=f"{until_date.isoformat()}T23:59:59Z" if until_date else None,
+                            branch=branch or None
+                        )
+                        st.session_state.title = f"Commit 요약 ({since_date or ''} ~ {until_date or ''})"
             
-            if commit_changes:
-                with st.spinner("LLM이 학습 내용을 요약하는 중..."):
-                    changes_text = "\n\n".join(f"📄 파일명: {c['filename']} ({c['status']})\n{c['patch']}" for c in commit_changes)
-                    prompt = message.make_prompt(changes_text)
-                    response = message.client.chat.completions.create(
-                        model="gpt-4o",
-                        temperature=0,
-                        messages=[
-                            {"role": "system", "content": "너는 개발자의 학습을 돕는 코드 분석 전문가다. 주어진 형식에 맞춰 명확하고 실용적인 학습 요약을 작성한다."},
-                            {"role": "user", "content": prompt}
-                        ]
-                    )
-                    # 💡 LLM 결과를 세션 상태(단기 기억 장치)에 저장!
-                    st.session_state.summary = response.choices[0].message.content
-                    st.rerun() # 페이지를 새로고침하여 미리보기 화면을 보여줌
-            else:
-                st.error("❗ 변경 내역을 가져오지 못했습니다. 입력 정보를 확인해 주세요.")
+                if commit_changes:
+                    # 단일 커밋은 확인한 SHA, 범위/기간 모드는 포함된 커밋 SHA 목록 전체를 캐시 키로 사용
+                    commit_id = commit_hash or ",".join(dict.fromkeys(c['commit'] for c in commit_changes))
+                    # lockfile·생성 파일·공백 변경 등을 걸러내고 중요한 코드부터 정렬
+                    commit_changes, filter_report = diff_filter.filter_changes(commit_changes)
+                    st.caption(diff_filter.format_report(filter_report))
+                    st.caption("Notion에 작성될 내용 미리보기")
+                    with st.spinner("LLM이 학습 내용을 요약하는 중..."):
+                        # 💡 생성되는 토큰을 바로 미리보기에 그리면서, 완성된 결과는 세션 상태(단기 기억 장치)에 저장!
+                        # (같은 커밋은 디스크 캐시에서 바로 가져옴)
+                        try:
+                            if make_infographic:
+                                # 인포그래픽 요청은 요약 스트림과 동시에 진행됨
+                                summary_stream, infographic_future = message.stream_summary_with_infographic(
+                                    commit_changes,
+                                    repo=f"{github_owner}/{github_repo}",
+                                    commit_sha=commit_id,
+                                    model=message.SUMMARY_MODEL,
+                                    system_prompt=message.SUMMARY_SYSTEM_PROMPT
+                                )
+                                st.session_state.summary = st.write_stream(summary_stream)
+                                try:
+                                    st.session_state.infographic = infographic_future.result()
+                                except Exception as e:
+                                    st.warning(f"인포그래픽 생성 실패: {type(e).__name__}: {e}")
+                            else:
+                                st.session_state.summary = st.write_stream(message.stream_summary(
+                                    commit_changes,
+                                    repo=f"{github_owner}/{github_repo}",
+                                    commit_sha=commit_id,
+                                    model=message.SUMMARY_MODEL,
+                                    system_prompt=message.SUMMARY_SYSTEM_PROMPT
+                                ))
+                        except message.PromptBudgetExceeded as e:
+                            # 변경 내역이 너무 커서 요청 전에 막힌 경우 (MAX_PROMPT_TOKENS)
+                            st.error(f"❗ {e} 커밋 범위를 줄이거나 MAX_PROMPT_TOKENS를 늘려 주세요.")
+                            st.stop()
+                        st.session_state.timings["요약 생성"] = run.summary()
+                        st.rerun() # 페이지를 새로고침하여 확인/취소 화면을 보여줌
+                else:
+                    st.error("❗ 변경 내역을 가져오지 못했습니다. 입력 정보를 확인해 주세요.")
         else:
             st.warning("❗ 입력 정보를 모두 작성해주세요.")
 
@@ -71,13 +146,30 @@ else:
     st.caption("Notion에 작성될 내용 미리보기")
     st.markdown(st.session_state.summary)
     st.markdown("---")
+
+    # 📊 인포그래픽: 내려받거나, Notion 요약 구역 끝에 HTML 코드 블록으로 첨부
+    attach_infographic = False
+    if st.session_state.infographic:
+        st.download_button(
+            "인포그래픽 HTML 내려받기",
+            data=st.session_state.infographic,
+            file_name="commit_infographic.html",
+            mime="text/html"
+        )
+        attach_infographic = st.checkbox("Notion에 인포그래픽 HTML 첨부", value=True)
     
+    # 같은 커밋 요약을 다시 만든 경우, 새 구역을 덧붙이지 않고 기존 구역의 바뀐 블록만 고침
+    update_existing = st.checkbox(
+        "기존 요약 고치기",
+        help=f"페이지에 '{st.session_state.title}' 구역이 있으면 바뀐 블록만 수정/추가/삭제합니다. 없으면 새로 추가합니다."
+    )
+
     # 버튼을 옆으로 나란히 놓기 위해 컬럼 사용
     col1, col2 = st.columns(2)
 
     with col1:
         if st.button("확정 및 Notion 전송", type="primary"):
-            with st.spinner("Notion 페이지에 요약 내용을 작성하는 중..."):
+            with st.spinner("Notion 전송 대기열에 추가하는 중..."):
                 # Debug logs expander (collapsed by default)
                 with st.expander("Debug Logs", expanded=False):
                     try:
@@ -102,29 +194,62 @@ else:
                         
                         st.write("Preparing API call...")
                         st.write(f"Token length: {len(notion_token)} characters")
-                        st.write(f"Summary content length: {len(st.session_state.summary)} characters")
+                        notion_content = st.session_state.summary
+                        if attach_infographic:
+                            notion_content += "\n\n" + message.infographic_markdown(st.session_state.infographic)
+                        st.write(f"Summary content length: {len(notion_content)} characters")
                         
-                        notion_handler.send_to_notion(
+                        # 📮 블록을 대기열(SQLite)에 저장하고 바로 돌아옴 → 전송은 백그라운드 스레드가 담당
+                        # (같은 페이지·제목·요약은 한 번만 전송되고, 중단되면 완료된 배치 다음부터 이어서 보냄)
+                        job_key, enqueue_state = notion_outbox.get_outbox().enqueue(
                             notion_token=notion_token,
                             page_id=page_id,
-                            title=f"Commit 요약 ({commit_hash[:7]})",
-                            summary_content=st.session_state.summary # 세션 상태에서 요약 내용을 가져옴
+                            title=st.session_state.title,
+                            summary_content=notion_content, # 세션 상태에서 요약 내용을 가져옴
+                            update=update_existing
                         )
-                        
-                        st.write("Process completed successfully!")
+                        st.write(f"Queued job {job_key[:8]} ({enqueue_state})")
                         
                     except Exception as e:
                         st.error(f"Error occurred: {type(e).__name__}: {str(e)}")
                         st.stop()
                 
                 # Success message (outside expander, visible to all users)
-                st.success("🎉 Notion 페이지 작성이 완료되었습니다!")
-                st.balloons()
+                if enqueue_state == "created":
+                    st.success("📮 Notion 전송을 시작했습니다! 진행 상황은 사이드바에서 확인할 수 있습니다.")
+                    st.balloons()
+                elif enqueue_state == "requeued":
+                    if update_existing:
+                        st.success("📮 기존 구역을 다시 비교해 고칩니다. 진행 상황은 사이드바에서 확인할 수 있습니다.")
+                    else:
+                        st.success("📮 이전에 실패한 전송을 다시 시도합니다. 진행 상황은 사이드바에서 확인할 수 있습니다.")
+                else:
+                    st.info("이미 전송했거나 전송 중인 요약입니다. 다시 보내지 않습니다.")
                 # 💡 작업 완료 후, 세션 상태를 초기화하여 다시 처음 화면으로 돌아감
                 del st.session_state.summary
+                del st.session_state.infographic
 
     with col2:
         if st.button("취소"):
             # 💡 취소 버튼을 누르면 세션 상태를 초기화하여 처음 화면으로 돌아감
             del st.session_state.summary
-            st.rerun()
\ No newline at end of file
+            del st.session_state.infographic
+            st.rerun()
+
+# %%
+# 📮 Notion 전송 대기열 상태
+outbox_jobs = notion_outbox.get_outbox().recent(limit=5)
+if outbox_jobs:
+    st.sidebar.subheader("📮 Notion 전송 대기열")
+    for job in outbox_jobs:
+        icon = {"done": "✅", "failed": "❌"}.get(job["status"], "⏳")
+        st.sidebar.write(f"{icon} {job['title']} ({job['acked']}/{job['total']} 배치)")
+        if job["error"]:
+            st.sidebar.caption(job["error"])
+    st.sidebar.button("새로고침", key="outbox_refresh")
+
+# ⏱️ 단계별 소요 시간 패널 (선택)
+if st.sidebar.checkbox("⏱️ 단계별 소요 시간 보기") and st.session_state.timings:
+    for run_name, rows in st.session_state.timings.items():
+        st.sidebar.caption(run_name)
+        st.sidebar.dataframe(rows, hide_index=True)
@@ -0,0 +1,509 @@
+# 파일명: batch_summary.py
+# 실행: python batch_summary.py owner/repo --since 2024-01-01 [--until 2024-12-31] [--branch main]
+#       python batch_summary.py owner/repo --base <커밋> --head main
+#       python batch_summary.py owner/repo --shas <sha1>,<sha2>,...
+#       python batch_summary.py --resume    이미 제출한 배치를 이어서 기다리고 결과를 Notion에 보냄
+#       python batch_summary.py --status    요청/배치 상태 보기
+#
+# 📦 OpenAI Batch API로 과거 커밋을 한꺼번에 요약 (리포지토리를 처음 연결할 때 전체 이력 기록용)
+# - 커밋마다 make_prompt 요청을 만들어 JSONL 파일 하나로 올리고 배치 작업을 제출
+# - 완료될 때까지 상태를 주기적으로 확인한 뒤, 결과를 custom_id로 커밋에 다시 연결해
+#   요약 캐시에 저장하고 Notion 전송 대기열(notion_outbox)에 커밋 순서대로 넣음
+# - 요청·배치 상태를 SQLite에 기록하므로 중간에 꺼져도 --resume으로 이어서 진행
+#   (제출한 배치는 다시 제출하지 않고, 만료·실패로 결과가 없는 요청만 다음 실행에서 다시 제출)
+# - 결과가 나오기까지 최대 24시간 걸리지만, 동기 호출보다 비용이 절반이고 분당 요청 한도를 쓰지 않음
+# 토큰은 GITHUB_TOKEN, NOTION_TOKEN, 기본 페이지는 NOTION_PAGE_ID 환경 변수에서 읽습니다.
+# OPENAI_BASE_URL을 benchmarks/fake_services.py의 FakeOpenAI 주소로 바꾸면 요금 없이 시험할 수 있습니다.
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+import diff_filter
+import message
+import metrics
+import notion_outbox
+import summary_cache
+
+BATCH_DB_PATH = os.getenv("BATCH_DB_PATH", os.path.join(".cache", "batches.sqlite3"))
+POLL_INTERVAL = int(os.getenv("BATCH_POLL_INTERVAL", 60))  # 배치 상태 확인 간격(초)
+MAX_BATCH_REQUESTS = 50000                # 배치 하나에 넣을 수 있는 최대 요청 수 (OpenAI 제한)
+MAX_BATCH_BYTES = 190 * 1024 * 1024       # 입력 파일 크기 상한 (OpenAI 제한 200MB보다 조금 작게)
+MAX_SUBMIT_ROUNDS = 3   # 만료된 배치의 남은 요청을 한 번 실행에서 다시 제출하는 최대 횟수
+FINISHED_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchStore:
+    """
+    items:   커밋 하나 = 요청 하나 (state: pending / submitted / done / queued / failed / skipped)
+             seq는 커밋 순서이며, Notion에는 이 순서대로 넣습니다.
+    batches: 제출한 배치 (status: OpenAI 배치 상태, collected: 결과를 반영했는지)
+    """
+
+    def __init__(self, path=BATCH_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " custom_id TEXT PRIMARY KEY,"
+                " seq INTEGER NOT NULL,"
+                " repo TEXT NOT NULL,"
+                " sha TEXT NOT NULL,"
+                " page_id TEXT NOT NULL,"
+                " cache_key TEXT NOT NULL,"
+                " request TEXT,"
+                " batch_id TEXT,"
+                " state TEXT NOT NULL,"
+                " summary TEXT,"
+                " error TEXT,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS batches ("
+                " batch_id TEXT PRIMARY KEY,"
+                " input_file_id TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " collected INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def item_states(self, custom_ids):
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT custom_id, state FROM items WHERE custom_id IN ({','.join('?' * len(custom_ids))})",
+                custom_ids,
+            ).fetchall()
+        return dict(rows)
+
+    def put_item(self, custom_id, repo, sha, page_id, cache_key, state, request=None, summary=None, error=None):
+        """
+        새 요청을 추가하거나, 실패했던 요청을 새 내용으로 바꿉니다. (순서 seq는 처음 추가할 때 정해짐)
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO items (custom_id, seq, repo, sha, page_id, cache_key, request, state, summary,"
+                " error, updated_at)"
+                " VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM items), ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(custom_id) DO UPDATE SET request = excluded.request, state = excluded.state,"
+                " summary = excluded.summary, error = excluded.error, batch_id = NULL,"
+                " updated_at = excluded.updated_at",
+                (custom_id, repo, sha, page_id, cache_key, request, state, summary, error, now),
+            )
+
+    def pending_requests(self):
+        with self._lock, self._connect() as conn:
+            return conn.execute(
+                "SELECT custom_id, request FROM items WHERE state = 'pending' ORDER BY seq"
+            ).fetchall()
+
+    def add_batch(self, batch_id, input_file_id, status, custom_ids):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO batches (batch_id, input_file_id, status, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (batch_id, input_file_id, status, now, now),
+            )
+            conn.executemany(
+                "UPDATE items SET batch_id = ?, state = 'submitted', updated_at = ? WHERE custom_id = ?",
+                [(batch_id, now, custom_id) for custom_id in custom_ids],
+            )
+
+    def open_batches(self):
+        with self._lock, self._connect() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT batch_id FROM batches WHERE collected = 0 ORDER BY created_at"
+            )]
+
+    def set_batch_status(self, batch_id, status):
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE batches SET status = ?, updated_at = ? WHERE batch_id = ?",
+                         (status, time.time(), batch_id))
+
+    def submitted_items(self, batch_id):
+        with self._lock, self._connect() as conn:
+            return dict(conn.execute(
+                "SELECT custom_id, cache_key FROM items WHERE batch_id = ? AND state = 'submitted'", (batch_id,)
+            ).fetchall())
+
+    def finish_batch(self, batch_id, results, status):
+        """
+        배치 결과를 한 번에 반영합니다. results: {custom_id: (state, summary, error)}
+        결과가 없는 요청(만료·취소·실패한 배치)은 pending으로 되돌려 다음 실행에서 다시 제출합니다.
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "UPDATE items SET state = ?, summary = ?, error = ?, updated_at = ?"
+                " WHERE custom_id = ? AND batch_id = ? AND state = 'submitted'",
+                [(state, summary, error, now, custom_id, batch_id)
+                 for custom_id, (state, summary, error) in results.items()],
+            )
+            retried = conn.execute(
+                "UPDATE items SET state = 'pending', batch_id = NULL, updated_at = ?"
+                " WHERE batch_id = ? AND state = 'submitted'",
+                (now, batch_id),
+            ).rowcount
+            conn.execute("UPDATE batches SET status = ?, collected = 1, updated_at = ? WHERE batch_id = ?",
+                         (status, now, batch_id))
+        return retried
+
+    def ready_to_queue(self):
+        """
+        Notion 대기열에 넣을 요약을 (페이지, 커밋 순서)대로 돌려줍니다.
+        페이지마다 아직 결과가 없는 커밋을 만나면 거기서 멈춰, 페이지에 커밋 순서대로 쌓이게 합니다.
+        """
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT custom_id, page_id, sha, state, summary FROM items ORDER BY page_id, seq"
+            ).fetchall()
+        ready, blocked = [], set()
+        for custom_id, page_id, sha, state, summary in rows:
+            if page_id in blocked:
+                continue
+            if state in ("pending", "submitted"):
+                blocked.add(page_id)
+            elif state == "done":
+                ready.append((custom_id, page_id, sha, summary))
+        return ready
+
+    def mark_queued(self, custom_id):
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE items SET state = 'queued', updated_at = ? WHERE custom_id = ?",
+                         (time.time(), custom_id))
+
+    def counts(self):
+        with self._lock, self._connect() as conn:
+            items = dict(conn.execute("SELECT state, COUNT(*) FROM items GROUP BY state").fetchall())
+            batches = conn.execute(
+                "SELECT batch_id, status, collected,"
+                " (SELECT COUNT(*) FROM items i WHERE i.batch_id = b.batch_id)"
+                " FROM batches b ORDER BY created_at"
+            ).fetchall()
+        return items, batches
+
+
+def make_custom_id(repo, sha, page_id):
+    return notion_outbox.make_key(repo, sha, page_id)[:32]
+
+
+def prepare(store, owner, repo, shas, page_id, github_token=None, model=message.SUMMARY_MODEL,
+            system_prompt=message.SUMMARY_SYSTEM_PROMPT, log=print):
+    """
+    커밋마다 Batch API 요청(JSONL 한 줄)을 만들어 저장하고, 새로 준비한 요청 수를 반환합니다.
+    - 이미 준비·제출·완료한 커밋은 건너뛰고, 실패했던 커밋만 다시 준비합니다.
+    - 요약 캐시에 있는 커밋은 요청 없이 바로 완료로 표시합니다.
+    """
+    full_name = f"{owner}/{repo}"
+    ids = {sha: make_custom_id(full_name, sha, page_id) for sha in shas}
+    states = store.item_states(list(ids.values()))
+    todo = [sha for sha in shas if states.get(ids[sha]) in (None, "failed")]
+    if not todo:
+        return 0
+
+    cache = summary_cache.get_cache()
+    all_changes = message.get_commits_changes(owner, repo, todo, github_token=github_token)
+    prepared = 0
+    for sha in todo:
+        custom_id = ids[sha]
+        cache_key = summary_cache.make_key(full_name, sha, model, 0, message.prompt_hash(system_prompt))
+        changes = all_changes[sha]
+        if changes is None:
+            store.put_item(custom_id, full_name, sha, page_id, cache_key, "failed",
+                           error="GitHub에서 변경 내역을 가져오지 못했습니다.")
+            log(f"❌ {full_name}@{sha[:7]}: 변경 내역을 가져오지 못했습니다.")
+            continue
+        if not changes:
+            store.put_item(custom_id, full_name, sha, page_id, cache_key, "skipped")
+            continue
+
+        cached = cache.get(cache_key)
+        metrics.record("summary_cache", hit=int(cached is not None))
+        if cached is not None:
+            store.put_item(custom_id, full_name, sha, page_id, cache_key, "done", summary=cached)
+            continue
+
+        changes, filter_report = diff_filter.filter_changes(changes)
+        log(f"🧹 {full_name}@{sha[:7]} {diff_filter.format_report(filter_report)}")
+        # 큰 커밋의 청크 요약(llm_map)은 동기 호출로 먼저 만들고, 최종 요약만 배치로 보냄
+        with metrics.stage("batch_prepare", model=model) as m:
+            prompt = message.build_summary_prompt(changes, model)
+            try:
+                message.preflight(m, model, system_prompt, prompt)
+            except message.PromptBudgetExceeded as e:
+                store.put_item(custom_id, full_name, sha, page_id, cache_key, "failed", error=str(e))
+                log(f"❌ {full_name}@{sha[:7]}: {e}")
+                continue
+        request = {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model,
+                "temperature": 0,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ]
+            }
+        }
+        store.put_item(custom_id, full_name, sha, page_id, cache_key, "pending",
+                       request=json.dumps(request, ensure_ascii=False))
+        prepared += 1
+    return prepared
+
+
+def _split_requests(rows):
+    # 요청 수·파일 크기 제한에 맞춰 여러 배치로 나눔
+    group, size = [], 0
+    for custom_id, request in rows:
+        line = (request + "\n").encode("utf-8")
+        if group and (len(group) >= MAX_BATCH_REQUESTS or size + len(line) > MAX_BATCH_BYTES):
+            yield group
+            group, size = [], 0
+        group.append((custom_id, line))
+        size += len(line)
+    if group:
+        yield group
+
+
+def _find_submitted(client, group_key):
+    """
+    제출 직후 기록 전에 꺼졌던 경우를 위해, 같은 요청 묶음으로 이미 만든 배치가 있는지 찾습니다.
+    """
+    for batch in client.batches.list(limit=100).data:
+        if (batch.metadata or {}).get("code_diary_group") == group_key and batch.status not in (
+                "failed", "expired", "cancelled"):
+            return batch
+    return None
+
+
+def submit(store, client=None, log=print):
+    """
+    pending 요청을 JSONL 파일로 올리고 배치를 제출합니다. 제출한 배치 ID 목록을 반환합니다.
+    """
+    client = client or message.get_client()
+    batch_ids = []
+    for group in _split_requests(store.pending_requests()):
+        custom_ids = [custom_id for custom_id, _ in group]
+        group_key = notion_outbox.make_key(*custom_ids)[:32]
+        batch = _find_submitted(client, group_key)
+        if batch is None:
+            data = b"".join(line for _, line in group)
+            with metrics.stage("batch_submit", requests=len(group), bytes=len(data)):
+                uploaded = client.files.create(file=("code_diary_batch.jsonl", data), purpose="batch")
+                batch = client.batches.create(
+                    input_file_id=uploaded.id,
+                    endpoint="/v1/chat/completions",
+                    completion_window="24h",
+                    metadata={"code_diary_group": group_key},
+                )
+        store.add_batch(batch.id, batch.input_file_id, batch.status, custom_ids)
+        batch_ids.append(batch.id)
+        log(f"📦 배치 {batch.id} 제출: 요청 {len(group)}개")
+    return batch_ids
+
+
+def _read_results(client, file_id):
+    if not file_id:
+        return []
+    text = client.files.content(file_id).text
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def collect(store, batch, client=None, log=print):
+    """
+    끝난 배치의 결과를 custom_id로 요청에 연결해 반영하고 (완료, 실패, 재제출할) 요청 수를 반환합니다.
+    성공한 요약은 동기 호출과 같은 키로 요약 캐시에도 저장합니다.
+    """
+    client = client or message.get_client()
+    cache = summary_cache.get_cache()
+    cache_keys = store.submitted_items(batch.id)
+    # 입력 파일 검증 실패 등 배치 전체가 실패한 이유
+    for error in getattr(batch.errors, "data", None) or []:
+        log(f"⚠️ 배치 {batch.id}: {error.code} {error.message}")
+    results = {}
+    for row in _read_results(client, batch.output_file_id) + _read_results(client, batch.error_file_id):
+        custom_id = row["custom_id"]
+        if custom_id not in cache_keys:
+            continue
+        response = row.get("response") or {}
+        body = response.get("body") or {}
+        if response.get("status_code") == 200:
+            summary = body["choices"][0]["message"]["content"]
+            with metrics.stage("llm_batch", model=body.get("model")) as m:
+                usage = body.get("usage") or {}
+                m["prompt_tokens"] = usage.get("prompt_tokens", 0)
+                m["completion_tokens"] = usage.get("completion_tokens", 0)
+                m["cached_tokens"] = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+            cache.put(cache_keys[custom_id], summary)
+            results[custom_id] = ("done", summary, None)
+        else:
+            error = row.get("error") or body.get("error") or {}
+            results[custom_id] = ("failed", None, f"{response.get('status_code')}: {error.get('message', error)}")
+
+    retried = store.finish_batch(batch.id, results, batch.status)
+    done = sum(1 for state, _, _ in results.values() if state == "done")
+    failed = len(results) - done
+    log(f"📥 배치 {batch.id} ({batch.status}): 완료 {done}, 실패 {failed}, 다시 제출할 요청 {retried}")
+    return done, failed, retried
+
+
+def poll(store, client=None, interval=POLL_INTERVAL, timeout=None, log=print):
+    """
+    제출한 배치가 모두 끝날 때까지 상태를 확인하며 끝난 배치의 결과를 반영합니다.
+    timeout(초)이 지나면 남은 배치 ID 목록을 반환합니다. (다음 실행에서 --resume으로 이어서 확인)
+    """
+    client = client or message.get_client()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        remaining = []
+        for batch_id in store.open_batches():
+            try:
+                with metrics.stage("batch_poll"):
+                    batch = client.batches.retrieve(batch_id)
+            except Exception as e:
+                log(f"⚠️ 배치 {batch_id} 상태 확인 실패: {type(e).__name__}: {e}")
+                remaining.append(batch_id)
+                continue
+            store.set_batch_status(batch_id, batch.status)
+            if batch.status in FINISHED_STATUSES:
+                collect(store, batch, client=client, log=log)
+            else:
+                counts = batch.request_counts
+                log(f"⏳ 배치 {batch_id} {batch.status}: "
+                    f"{counts.completed + counts.failed}/{counts.total}" if counts else f"⏳ 배치 {batch_id} {batch.status}")
+                remaining.append(batch_id)
+        if not remaining or (deadline is not None and time.monotonic() >= deadline):
+            return remaining
+        time.sleep(interval)
+
+
+def queue_results(store, notion_token, outbox=None, log=print):
+    """
+    완료된 요약을 커밋 순서대로 Notion 전송 대기열에 넣고, 넣은 작업 키 목록을 반환합니다.
+    """
+    outbox = outbox or notion_outbox.get_outbox()
+    keys = []
+    for custom_id, page_id, sha, summary in store.ready_to_queue():
+        key, _ = outbox.enqueue(
+            notion_token=notion_token,
+            page_id=page_id,
+            title=f"Commit 요약 ({sha[:7]})",
+            summary_content=summary
+        )
+        store.mark_queued(custom_id)
+        keys.append(key)
+    if keys:
+        log(f"📮 Notion 전송 대기열에 {len(keys)}개 추가")
+    return keys
+
+
+def wait_for_outbox(keys, outbox=None, interval=1.0):
+    """
+    대기열 작업이 모두 끝날(done/failed) 때까지 기다립니다. (CLI가 전송 도중 종료되지 않도록)
+    """
+    outbox = outbox or notion_outbox.get_outbox()
+    pending = list(keys)
+    while pending:
+        pending = [key for key in pending if outbox.status(key)["status"] not in ("done", "failed")]
+        if pending:
+            time.sleep(interval)
+
+
+def run(store, notion_token, interval=POLL_INTERVAL, timeout=None, log=print):
+    """
+    제출 → 완료까지 대기 → 결과를 Notion 대기열에 넣기까지 한 번에 실행합니다. (--resume도 같은 흐름)
+    """
+    remaining = []
+    for _ in range(MAX_SUBMIT_ROUNDS):
+        # 처음 제출할 요청 + 만료된 배치에서 결과를 못 받은 요청
+        submit(store, log=log)
+        remaining = poll(store, interval=interval, timeout=timeout, log=log)
+        if remaining or not store.pending_requests():
+            break
+    keys = queue_results(store, notion_token, log=log)
+    if remaining:
+        log(f"⏸️ 아직 끝나지 않은 배치 {len(remaining)}개: 나중에 --resume으로 이어서 진행하세요.")
+    return keys
+
+
+def print_status(store):
+    items, batches = store.counts()
+    print("요청: " + ", ".join(f"{state} {count}" for state, count in sorted(items.items())))
+    for batch_id, status, collected, count in batches:
+        print(f"  {batch_id:<32} {status:<12} 요청 {count:>5}" + ("  (반영 완료)" if collected else ""))
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="OpenAI Batch API로 과거 커밋을 한꺼번에 요약해 Notion에 기록")
+    parser.add_argument("repo", nargs="?", help="owner/repo")
+    parser.add_argument("--page-id", default=os.getenv("NOTION_PAGE_ID"))
+    parser.add_argument("--since", help="ISO 8601 날짜 (예: 2024-01-01)")
+    parser.add_argument("--until")
+    parser.add_argument("--branch")
+    parser.add_argument("--base")
+    parser.add_argument("--head")
+    parser.add_argument("--shas", help="쉼표로 구분한 커밋 SHA 목록 (오래된 순)")
+    parser.add_argument("--model", default=message.SUMMARY_MODEL)
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL)
+    parser.add_argument("--timeout", type=float, help="이 시간(초)만 기다리고 종료 (다음에 --resume)")
+    parser.add_argument("--resume", action="store_true", help="새로 제출하지 않고 남은 배치만 이어서 진행")
+    parser.add_argument("--status", action="store_true")
+    args = parser.parse_args()
+
+    store = BatchStore()
+    if args.status:
+        print_status(store)
+        return
+    if not args.resume:
+        if not args.repo or "/" not in args.repo:
+            parser.error("owner/repo를 입력하세요. (이어서 진행하려면 --resume)")
+        if not args.page_id:
+            parser.error("--page-id 또는 NOTION_PAGE_ID 환경 변수가 필요합니다.")
+
+    github_token = os.getenv("GITHUB_TOKEN")
+    notion_token = os.getenv("NOTION_TOKEN")
+    if not notion_token:
+        parser.error("NOTION_TOKEN 환경 변수가 필요합니다.")
+    with metrics.start_run("batch", repo=args.repo or "resume") as run_metrics:
+        if not args.resume:
+            owner, repo = args.repo.split("/", 1)
+            if args.shas:
+                shas = [sha.strip() for sha in args.shas.split(",") if sha.strip()]
+            else:
+                shas = message.list_commits(
+                    owner, repo, github_token=github_token, base=args.base, head=args.head,
+                    since=f"{args.since}T00:00:00Z" if args.since else None,
+                    until=f"{args.until}T23:59:59Z" if args.until else None,
+                    branch=args.branch,
+                )
+            if shas is None:
+                raise SystemExit("❌ 커밋 목록을 가져오지 못했습니다.")
+            prepared = prepare(store, owner, repo, shas, args.page_id, github_token=github_token, model=args.model)
+            print(f"🗂️ 커밋 {len(shas)}개 중 새로 준비한 요청 {prepared}개")
+
+        keys = run(store, notion_token, interval=args.poll_interval, timeout=args.timeout)
+        wait_for_outbox(keys)
+
+    print_status(store)
+    for row in run_metrics.summary():
+        print(f"⏱️ {row['stage']:<16} {row['count']:>3}회 {row['seconds']:8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
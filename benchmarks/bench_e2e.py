@@ -0,0 +1,321 @@
+# 파일명: benchmarks/bench_e2e.py
+# 실행: python benchmarks/bench_e2e.py [--scenario huge small throttle] [--save result.json] [--compare base.json]
+#
+# 로컬 GitHub / OpenAI / Notion 대역 서버(fake_services.py)를 띄우고
+# 웹훅 서버와 같은 경로(get_commit_changes → diff 필터 → 요약 → send_to_notion)를 실제 코드로 실행해
+# 처리량과 p50/p99 지연 시간을 잽니다. 외부 서비스 없이 성능 변화를 비교할 수 있습니다.
+#
+# 시나리오
+#   huge      파일 수천 개짜리 커밋 1개 (페이지네이션, raw diff 보충, map-reduce 요약, 여러 배치 전송)
+#   small     작은 커밋 100개를 웹훅 대기열(JournalQueue)로 처리
+#   throttle  Notion이 초당 요청 수를 제한하고 가끔 503을 내는 상황에서 긴 요약 여러 개 전송
+#   update    이미 작성한 요약을 일부만 바뀐 새 요약으로 고치기 (기존 구역 제자리 수정)
+#   batch     작은 커밋 100개를 Batch API로 한꺼번에 요약해 Notion 전송 대기열로 보내기 (batch_summary)
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fake_services
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("huge", "small", "throttle", "update", "batch")
+
+
+def percentile(values, p):
+    # nearest-rank 방식
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def stage_delta(before, after):
+    delta = {}
+    for stage, totals in after.items():
+        prev = before.get(stage, {})
+        row = {key: round(value - prev.get(key, 0), 6) for key, value in totals.items()}
+        if row.get("count"):
+            delta[stage] = row
+    return delta
+
+
+def result_row(name, latencies, wall, items, unit, services, stages):
+    return {
+        "scenario": name,
+        "items": items,
+        "unit": unit,
+        "wall_seconds": round(wall, 3),
+        "throughput_per_s": round(items / wall, 3) if wall else 0,
+        "p50_seconds": round(percentile(latencies, 50), 3),
+        "p99_seconds": round(percentile(latencies, 99), 3),
+        "services": {s.name: dict(s.stats) for s in services},
+        "stages": stages,
+    }
+
+
+def run_huge(args, env):
+    github, openai, notion = env["github"], env["openai"], env["notion"]
+    webhook_server, metrics = env["webhook_server"], env["metrics"]
+
+    latencies = []
+    before = metrics.snapshot()
+    wall_start = time.perf_counter()
+    for i in range(args.repeat):
+        sha = f"huge{i:036d}"
+        github.add_commit("bench/huge", sha, fake_services.make_files(
+            args.huge_files, seed=i, big_every=args.big_every))
+        start = time.perf_counter()
+        webhook_server.process_commit("bench/huge", sha)
+        latencies.append(time.perf_counter() - start)
+    wall = time.perf_counter() - wall_start
+    return result_row("huge", latencies, wall, args.repeat, "commits", (github, openai, notion),
+                      stage_delta(before, metrics.snapshot()))
+
+
+def run_small(args, env):
+    github, openai, notion = env["github"], env["openai"], env["notion"]
+    webhook_server, metrics = env["webhook_server"], env["metrics"]
+
+    commits = {}
+    for i in range(args.commits):
+        repo, sha = f"bench/repo-{i % args.repos}", f"small{i:035d}"
+        github.add_commit(repo, sha, fake_services.make_files(args.small_files, seed=1000 + i))
+        commits.setdefault(repo, []).append(sha)
+
+    latencies = []
+
+    def process(repo, sha):
+        start = time.perf_counter()
+        webhook_server.process_commit(repo, sha)
+        latencies.append(time.perf_counter() - start)
+
+    queue = webhook_server.JournalQueue(process, max_workers=args.repos, max_pending_per_repo=args.commits)
+    before = metrics.snapshot()
+    wall_start = time.perf_counter()
+    for repo, shas in commits.items():
+        queue.submit(repo, shas)
+    queue.wait_idle()
+    wall = time.perf_counter() - wall_start
+    queue.shutdown()
+    if len(latencies) != args.commits:
+        raise SystemExit(f"❌ small: {args.commits - len(latencies)}개 커밋 처리 실패")
+    return result_row("small", latencies, wall, args.commits, "commits", (github, openai, notion),
+                      stage_delta(before, metrics.snapshot()))
+
+
+def run_throttle(args, env):
+    notion, notion_handler, metrics = env["notion"], env["notion_handler"], env["metrics"]
+    notion.rate_limit = args.throttle_rate
+    notion.error_every = args.throttle_error_every
+
+    summary = fake_services.make_summary(args.throttle_lines)
+    latencies = []
+
+    def send(i):
+        start = time.perf_counter()
+        notion_handler.send_to_notion("bench-token", f"throttle-page-{i}", f"Commit 요약 (t{i:06d})",
+                                      summary, log=lambda *_: None)
+        latencies.append(time.perf_counter() - start)
+
+    before = metrics.snapshot()
+    wall_start = time.perf_counter()
+    # 웹훅 서버가 서로 다른 리포지토리(페이지)를 동시에 처리하는 것처럼 보냄
+    with ThreadPoolExecutor(max_workers=env["webhook_server"].WEBHOOK_WORKERS) as pool:
+        for future in [pool.submit(metrics.bind(send), i) for i in range(args.throttle_pages)]:
+            future.result()
+    wall = time.perf_counter() - wall_start
+    notion.rate_limit, notion.error_every = None, 0
+    return result_row("throttle", latencies, wall, args.throttle_pages, "summaries", (notion,),
+                      stage_delta(before, metrics.snapshot()))
+
+
+def run_update(args, env):
+    notion, notion_handler, metrics = env["notion"], env["notion_handler"], env["metrics"]
+
+    summary = fake_services.make_summary(args.throttle_lines)
+    lines = summary.splitlines()
+    # 약 5%의 줄을 고치고, 몇 줄은 추가/삭제한 새 요약
+    for index in range(3, len(lines), 20):
+        lines[index] = lines[index] + " (수정)"
+    lines[10:12] = []
+    lines.insert(40, "- **추가**: 다시 요약하면서 새로 찾은 내용")
+    resummary = "\n".join(lines)
+
+    pages = [f"update-page-{i}" for i in range(args.update_pages)]
+    for i, page_id in enumerate(pages):
+        notion_handler.send_to_notion("bench-token", page_id, f"Commit 요약 (u{i:06d})", summary,
+                                      log=lambda *_: None)
+    notion.stats = dict.fromkeys(notion.stats, 0)
+
+    latencies = []
+    before = metrics.snapshot()
+    wall_start = time.perf_counter()
+    for i, page_id in enumerate(pages):
+        start = time.perf_counter()
+        notion_handler.update_in_notion("bench-token", page_id, f"Commit 요약 (u{i:06d})", resummary,
+                                        log=lambda *_: None)
+        latencies.append(time.perf_counter() - start)
+    wall = time.perf_counter() - wall_start
+    return result_row("update", latencies, wall, len(pages), "summaries", (notion,),
+                      stage_delta(before, metrics.snapshot()))
+
+
+def run_batch(args, env):
+    github, openai, notion = env["github"], env["openai"], env["notion"]
+    batch_summary, metrics = env["batch_summary"], env["metrics"]
+
+    shas = [f"{i:07x}{'b' * 33}" for i in range(args.commits)]  # 제목(앞 7자리)이 커밋마다 다르게
+    for i, sha in enumerate(shas):
+        github.add_commit("bench/batch", sha, fake_services.make_files(args.small_files, seed=3000 + i))
+
+    store = batch_summary.BatchStore()
+    outbox = batch_summary.notion_outbox.get_outbox()
+    before = metrics.snapshot()
+    wall_start = time.perf_counter()
+    batch_summary.prepare(store, "bench", "batch", shas, "bench-batch-page", github_token="ghp-bench")
+    keys = batch_summary.run(store, "bench-token", interval=0.2)
+    # 커밋마다 Notion 전송이 끝난 시점까지의 시간
+    latencies, pending = [], set(keys)
+    while pending:
+        for key in list(pending):
+            if outbox.status(key)["status"] in ("done", "failed"):
+                latencies.append(time.perf_counter() - wall_start)
+                pending.discard(key)
+        time.sleep(0.05)
+    wall = time.perf_counter() - wall_start
+    if len(latencies) != args.commits:
+        raise SystemExit(f"❌ batch: {args.commits - len(latencies)}개 커밋 처리 실패")
+    return result_row("batch", latencies, wall, args.commits, "commits", (github, openai, notion),
+                      stage_delta(before, metrics.snapshot()))
+
+
+def print_result(row):
+    print(f"\n▶ {row['scenario']}: {row['items']} {row['unit']} in {row['wall_seconds']:.2f}s "
+          f"→ {row['throughput_per_s']:.2f} {row['unit']}/s | "
+          f"p50 {row['p50_seconds']:.3f}s, p99 {row['p99_seconds']:.3f}s")
+    for name, stats in row["services"].items():
+        print(f"  {name:<7} requests {stats['requests']:>5}  429 {stats['rate_limited']:>4}  "
+              f"errors {stats['errors']:>4}  sent {stats['bytes_out'] / 1024:,.0f} KB")
+    for stage, totals in sorted(row["stages"].items(), key=lambda kv: -kv[1].get("seconds", 0)):
+        extra = ", ".join(f"{k}={v:g}" for k, v in totals.items() if k not in ("count", "seconds"))
+        print(f"  {stage:<18} x{totals['count']:<5g} {totals.get('seconds', 0):8.3f}s  {extra}")
+
+
+def compare(results, config, baseline_path, tolerance):
+    """
+    저장해 둔 결과와 비교해 wall/p50/p99가 tolerance 이상 느려진 항목을 돌려줍니다.
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        saved = json.load(f)
+    baseline = {row["scenario"]: row for row in saved["results"]}
+    regressions = []
+    print(f"\n📊 {baseline_path} 대비")
+    changed = sorted(k for k in config if k != "scenario" and saved["config"].get(k) != config[k])
+    if changed:
+        print(f"  ⚠️ 설정이 달라 직접 비교하기 어렵습니다: {', '.join(changed)}")
+    for row in results:
+        base = baseline.get(row["scenario"])
+        if not base:
+            continue
+        for key in ("wall_seconds", "p50_seconds", "p99_seconds"):
+            change = (row[key] - base[key]) / base[key] if base[key] else 0
+            mark = "⚠️" if change > tolerance else "  "
+            print(f"  {mark} {row['scenario']:<9} {key:<13} {base[key]:8.3f} → {row[key]:8.3f} ({change:+.1%})")
+            if change > tolerance:
+                regressions.append(f"{row['scenario']}.{key}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark against local GitHub/OpenAI/Notion stand-ins")
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--github-latency", type=float, default=0.03)
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="첫 토큰까지 걸리는 시간")
+    parser.add_argument("--openai-token-latency", type=float, default=0.001, help="completion 토큰당 시간")
+    parser.add_argument("--notion-latency", type=float, default=0.08)
+    parser.add_argument("--summary-lines", type=int, default=60, help="LLM이 돌려주는 요약 길이(줄)")
+    parser.add_argument("--huge-files", type=int, default=1000)
+    parser.add_argument("--big-every", type=int, default=50, help="N개 파일마다 patch가 생략되는 큰 파일 1개")
+    parser.add_argument("--repeat", type=int, default=3, help="huge 시나리오 반복 횟수")
+    parser.add_argument("--commits", type=int, default=100)
+    parser.add_argument("--small-files", type=int, default=3)
+    parser.add_argument("--repos", type=int, default=4, help="small 시나리오의 리포지토리(=동시 처리 lane) 수")
+    parser.add_argument("--throttle-pages", type=int, default=12)
+    parser.add_argument("--throttle-lines", type=int, default=250)
+    parser.add_argument("--throttle-rate", type=int, default=2, help="Notion 대역 서버의 초당 허용 요청 수")
+    parser.add_argument("--throttle-error-every", type=int, default=10, help="N번째 요청마다 503")
+    parser.add_argument("--update-pages", type=int, default=4, help="update 시나리오에서 고칠 요약 수")
+    parser.add_argument("--batch-latency", type=float, default=2.0, help="Batch API 대역 서버가 배치를 끝내는 시간")
+    parser.add_argument("--save", help="결과를 JSON으로 저장")
+    parser.add_argument("--compare", help="저장해 둔 결과 JSON과 비교")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="이 비율 이상 느려지면 종료 코드 1")
+    args = parser.parse_args()
+
+    github = fake_services.FakeGitHub(latency=args.github_latency).start()
+    openai = fake_services.FakeOpenAI(latency=args.openai_latency, token_latency=args.openai_token_latency,
+                                      summary_lines=args.summary_lines, batch_latency=args.batch_latency).start()
+    notion = fake_services.FakeNotion(latency=args.notion_latency).start()
+    workdir = tempfile.mkdtemp(prefix="bench-e2e-")
+
+    # 모듈이 import 시점에 읽는 설정이므로 import 전에 지정
+    os.environ.update({
+        "GITHUB_API_URL": github.url,
+        "OPENAI_BASE_URL": f"{openai.url}/v1",
+        "OPENAI_API_KEY": "sk-bench",
+        "NOTION_API_URL": notion.url,
+        "GITHUB_TOKEN": "ghp-bench",
+        "NOTION_TOKEN": "bench-token",
+        "NOTION_PAGE_ID": "bench-page",
+        "SUMMARY_CACHE_PATH": os.path.join(workdir, "summaries.sqlite3"),
+        "NOTION_OUTBOX_PATH": os.path.join(workdir, "notion_outbox.sqlite3"),
+        "BATCH_DB_PATH": os.path.join(workdir, "batches.sqlite3"),
+    })
+    os.environ.pop("METRICS_PATH", None)
+    # 재시도는 정상 동작이므로 notion_client의 경고 로그는 숨김 (횟수는 결과에 집계됨)
+    # (Client가 생성될 때 로거 레벨을 다시 설정하므로 레벨 대신 disabled 사용)
+    logging.getLogger("notion_client").disabled = True
+    sys.path.insert(0, ROOT)
+    import batch_summary
+    import metrics
+    import notion_handler
+    import webhook_server
+
+    env = {"github": github, "openai": openai, "notion": notion, "metrics": metrics,
+           "notion_handler": notion_handler, "webhook_server": webhook_server, "batch_summary": batch_summary}
+    runners = {"huge": run_huge, "small": run_small, "throttle": run_throttle, "update": run_update,
+               "batch": run_batch}
+
+    results = []
+    for name in args.scenario:
+        for service in (github, openai, notion):
+            service.stats = dict.fromkeys(service.stats, 0)
+        # 앞 시나리오의 Retry-After 대기가 이어지지 않도록 속도 제한기를 새로 만듦
+        notion_handler.notion_limiter = notion_handler.TokenBucket(
+            notion_handler.NOTION_RATE_LIMIT, notion_handler.NOTION_BURST)
+        # 처리 중 print 출력은 숨기고 결과만 보여줌
+        with contextlib.redirect_stdout(io.StringIO()):
+            row = runners[name](args, env)
+        print_result(row)
+        results.append(row)
+
+    for service in (github, openai, notion):
+        service.stop()
+
+    config = {k: v for k, v in vars(args).items() if k not in ("save", "compare", "tolerance")}
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.save}에 저장했습니다.")
+    if args.compare and compare(results, config, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
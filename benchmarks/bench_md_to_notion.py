@@ -0,0 +1,128 @@
+# 파일명: benchmarks/bench_md_to_notion.py
+# 실행: python benchmarks/bench_md_to_notion.py [--repeat 5]
+#
+# 큰 Markdown 입력에서 기존 변환 함수(아래 legacy_md_to_notion_blocks)와
+# notion_handler.md_to_notion_blocks의 속도 및 보존된 글자 수를 비교합니다.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import notion_handler  # noqa: E402
+
+
+# --- 비교 대상: 개선 전 변환 함수 (그대로 복사) ---
+def legacy_md_to_notion_blocks(md: str):
+    blocks, lines = [], md.splitlines()
+    code_mode, code_buf, code_lang = False, [], "plain text"
+
+    def flush_code():
+        nonlocal code_buf, code_lang
+        if not code_buf: return
+        code_text = "\n".join(code_buf)[:2000]
+        blocks.append({"object":"block","type":"code",
+                       "code":{"language":code_lang,
+                               "rich_text":[{"type":"text","text":{"content":code_text}}]}})
+        code_buf.clear(); code_lang = "plain text"
+
+    for raw in lines:
+        line = raw.rstrip("\n")
+        if line.strip().startswith("```"):
+            fence = line.strip()[3:].strip()
+            if not code_mode:
+                code_mode, code_lang, code_buf = True, (fence or "plain text"), []
+            else:
+                code_mode = False; flush_code()
+            continue
+        if code_mode: code_buf.append(line); continue
+        if not line.strip(): continue
+        if line.startswith("### "):
+            blocks.append({"object":"block","type":"heading_3", "heading_3":{"rich_text":[{"type":"text","text":{"content":line[4:]}}]}})
+            continue
+        if line.startswith("## "):
+            blocks.append({"object":"block","type":"heading_2", "heading_2":{"rich_text":[{"type":"text","text":{"content":line[3:]}}]}})
+            continue
+        if line.startswith("# "):
+            blocks.append({"object":"block","type":"heading_1", "heading_1":{"rich_text":[{"type":"text","text":{"content":line[2:]}}]}})
+            continue
+        if line.lstrip().startswith(("- ", "* ")):
+            content = line.lstrip()[2:]
+            blocks.append({"object":"block","type":"bulleted_list_item", "bulleted_list_item":{"rich_text":[{"type":"text","text":{"content":content[:1900]}}]}})
+            continue
+        blocks.append({"object":"block","type":"paragraph", "paragraph":{"rich_text":[{"type":"text","text":{"content":line[:1900]}}]}})
+    if code_mode: flush_code()
+    return blocks
+
+
+# --- 입력 생성: make_prompt 형식의 요약을 여러 번 이어 붙인 큰 문서 ---
+SECTION = """# 학습 요약
+
+## 1. 무엇을 했나요? (What)
+- **주제**: `get_commit_changes`에 *범위 조회* 기능 추가 ([문서](https://docs.github.com/rest))
+- **변경 사항**: 커넥션 풀 재사용, 동시 조회, 페이지네이션
+
+## 2. 핵심 코드 (Key Code)
+```python
+{code}
+```
+
+## 3. 어떻게 작동하나요? (How)
+1. **Step 1**: 커밋 목록을 가져온다
+2. **Step 2**: 스레드 풀에서 diff를 동시에 가져온다
+> 참고: 같은 세션을 공유하면 TLS 핸드셰이크가 줄어든다
+
+{long_paragraph}
+
+---
+
+## 7. 체크리스트 (Self-check)
+- [ ] 이 코드의 목적을 한 문장으로 설명할 수 있는가?
+- [x] 핵심 로직의 흐름을 그림으로 그릴 수 있는가?
+"""
+
+
+def make_markdown(sections):
+    code = "\n".join(f"result_{i} = fetch(session, sha_{i})  # 동시 조회" for i in range(120))
+    long_paragraph = "긴 설명 문단입니다. " * 400
+    return "\n".join(SECTION.format(code=code, long_paragraph=long_paragraph) for _ in range(sections))
+
+
+def kept_chars(blocks):
+    total = 0
+    for block in blocks:
+        for item in block[block["type"]].get("rich_text", []):
+            total += len(item["text"]["content"])
+    return total
+
+
+def bench(fn, md, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        blocks = fn(md)
+        best = min(best, time.perf_counter() - start)
+    return best, blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="md_to_notion_blocks micro-benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'sections':>8} {'input KB':>9} | {'legacy ms':>9} {'blocks':>6} {'kept %':>6} | "
+          f"{'new ms':>8} {'blocks':>6} {'kept %':>6}")
+    for sections in (10, 100, 500):
+        md = make_markdown(sections)
+        legacy_time, legacy_blocks = bench(legacy_md_to_notion_blocks, md, args.repeat)
+        new_time, new_blocks = bench(notion_handler.md_to_notion_blocks, md, args.repeat)
+        source_chars = len(md)
+        print(f"{sections:>8} {len(md.encode('utf-8')) / 1024:>9.0f} | "
+              f"{legacy_time * 1000:>9.1f} {len(legacy_blocks):>6} {kept_chars(legacy_blocks) / source_chars:>6.0%} | "
+              f"{new_time * 1000:>8.1f} {len(new_blocks):>6} {kept_chars(new_blocks) / source_chars:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# 파일명: benchmarks/bench_startup.py
+# 실행: python benchmarks/bench_startup.py [--runs 5] [--reruns 20]
+#
+# 1) 새 파이썬 프로세스에서 app.py가 쓰는 모듈(message, notion_handler)을 import 하는 시간
+# 2) Streamlit이 위젯 조작마다 app.py를 다시 실행하는(rerun) 시간
+# 을 측정합니다. rerun은 streamlit.testing의 AppTest로 실제 스크립트를 실행해 잰 값입니다.
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time(module, runs):
+    code = (
+        "import time, sys; sys.path.insert(0, %r); "
+        "t = time.perf_counter(); import %s; print(time.perf_counter() - t)" % (ROOT, module)
+    )
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT)
+        if out.returncode != 0:
+            raise SystemExit(out.stderr)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return times
+
+
+def heavy_modules_loaded(module):
+    code = (
+        "import sys; sys.path.insert(0, %r); import %s; "
+        "print(','.join(m for m in ('nbconvert', 'nbformat', 'pyperclip', 'markdown', 'openai', 'tiktoken') "
+        "if m in sys.modules))" % (ROOT, module)
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT)
+    return out.stdout.strip().splitlines()[-1] if out.stdout.strip() else ""
+
+
+def rerun_times(reruns):
+    from streamlit.testing.v1 import AppTest
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=30)
+    at.secrets["OPENAI_API_KEY"] = "sk-benchmark"
+    start = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - start
+
+    times = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+    return first, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit cold start / rerun benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    for module in ("message", "notion_handler"):
+        times = import_time(module, args.runs)
+        print(f"import {module:<15} median {statistics.median(times) * 1000:7.1f} ms "
+              f"(min {min(times) * 1000:.1f}) | loaded: {heavy_modules_loaded(module) or '-'}")
+
+    first, times = rerun_times(args.reruns)
+    print(f"app.py first run       {first * 1000:7.1f} ms")
+    print(f"app.py rerun           median {statistics.median(times) * 1000:7.1f} ms "
+          f"(p90 {sorted(times)[int(len(times) * 0.9) - 1] * 1000:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,574 @@
+# 파일명: benchmarks/fake_services.py
+#
+# 벤치마크용 로컬 GitHub / OpenAI / Notion 대역(stand-in) 서버입니다.
+# 실제 서비스의 API 모양(경로, 페이지네이션, 에러 형식)만 흉내 내고,
+# 응답 지연·429/503 에러·큰 payload를 설정으로 조절할 수 있습니다.
+#
+#   github = FakeGitHub(latency=0.03).start()
+#   github.add_commit("owner/repo", sha, make_files(...))
+#   os.environ["GITHUB_API_URL"] = github.url
+
+import email.parser
+import email.policy
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeService:
+    """
+    공통 동작:
+    - latency: 모든 요청에 더하는 응답 지연(초)
+    - rate_limit: 초당 허용 요청 수 (넘으면 429 + Retry-After)
+    - error_every: N번째 요청마다 error_status(기본 503)로 실패
+    - stats: 요청 수, 에러 수, 보낸 바이트 수
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=0.0, rate_limit=None, error_every=0, error_status=503, retry_after=1):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_every = error_every
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.recent = deque()
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0, "bytes_out": 0}
+        self.server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive (클라이언트 커넥션 풀 효과가 보이도록)
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                service._dispatch(self, "GET")
+
+            def do_POST(self):
+                service._dispatch(self, "POST")
+
+            def do_PATCH(self):
+                service._dispatch(self, "PATCH")
+
+            def do_DELETE(self):
+                service._dispatch(self, "DELETE")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def _fault(self):
+        """
+        이번 요청에 돌려줄 에러 상태 코드를 정합니다. (없으면 None)
+        """
+        with self.lock:
+            self.stats["requests"] += 1
+            now = time.monotonic()
+            if self.rate_limit:
+                while self.recent and now - self.recent[0] >= 1.0:
+                    self.recent.popleft()
+                if len(self.recent) >= self.rate_limit:
+                    self.stats["rate_limited"] += 1
+                    return 429
+                self.recent.append(now)
+            if self.error_every and self.stats["requests"] % self.error_every == 0:
+                self.stats["errors"] += 1
+                return self.error_status
+        return None
+
+    def _dispatch(self, handler, method):
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        if self.latency:
+            time.sleep(self.latency)
+        status = self._fault()
+        if status is not None:
+            self.send_error(handler, status)
+            return
+        self.handle(handler, method, urlparse(handler.path), body)
+
+    def handle(self, handler, method, url, body):
+        self.send_json(handler, 404, {"message": "Not Found"})
+
+    def send_error(self, handler, status):
+        self.send_json(handler, status, {"message": "fake error", "status": status},
+                       headers={"Retry-After": str(self.retry_after)})
+
+    def send_json(self, handler, status, payload, headers=None):
+        self.send_bytes(handler, status, json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+                        "application/json; charset=utf-8", headers)
+
+    def send_bytes(self, handler, status, data, content_type, headers=None):
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+        with self.lock:
+            self.stats["bytes_out"] += len(data)
+
+
+# 📂 GitHub
+def make_patch(rng, hunks=3, lines_per_hunk=12):
+    """
+    파이썬 코드처럼 보이는 unified diff patch를 만듭니다.
+    """
+    out = []
+    line_no = 1
+    for h in range(hunks):
+        line_no += rng.randint(5, 40)
+        out.append(f"@@ -{line_no},{lines_per_hunk} +{line_no},{lines_per_hunk + 2} @@ def handler_{h}():")
+        for i in range(lines_per_hunk):
+            kind = rng.random()
+            if i == 0 and rng.random() < 0.3:
+                out.append(f"+def helper_{h}_{rng.randint(0, 999)}(value, limit={rng.randint(1, 100)}):")
+            elif kind < 0.25:
+                out.append(f"-    result = compute_{i}(value, retries={rng.randint(1, 5)})")
+            elif kind < 0.55:
+                out.append(f"+    result = compute_{i}(value, retries={rng.randint(1, 5)}, timeout={rng.random():.2f})")
+            else:
+                out.append(f"     total += result  # step {i}")
+    return "\n".join(out)
+
+
+def make_files(count, seed=0, hunks=3, lines_per_hunk=12, big_every=0, big_hunks=200):
+    """
+    커밋 하나의 파일 목록 [{'filename', 'status', 'patch'}]을 만듭니다.
+    big_every > 0이면 N개마다 한 파일을 big_hunks개의 hunk를 가진 큰 파일로 만듭니다.
+    """
+    rng = random.Random(seed)
+    files = []
+    for i in range(count):
+        big = big_every and i % big_every == big_every - 1
+        files.append({
+            "filename": f"src/module_{i // 50}/file_{i}.py",
+            "status": "modified",
+            "patch": make_patch(rng, big_hunks if big else hunks, lines_per_hunk),
+        })
+    return files
+
+
+class FakeGitHub(FakeService):
+    """
+    GET /repos/{owner}/{repo}/commits/{sha}
+    - 파일 목록은 per_page(최대 100)개씩 나눠 Link 헤더로 다음 페이지를 알려줍니다.
+    - patch가 omit_patch_bytes보다 큰 파일은 실제 GitHub처럼 patch를 빼고 보냅니다.
+    - Accept: application/vnd.github.diff 이면 전체 raw diff를 보냅니다.
+    - Accept: application/vnd.github.sha 이면 커밋 SHA 문자열만 보냅니다.
+    """
+
+    name = "github"
+    _COMMIT_RE = re.compile(r"^/repos/([^/]+/[^/]+)/commits/([^/]+)$")
+
+    def __init__(self, omit_patch_bytes=20000, **kwargs):
+        super().__init__(**kwargs)
+        self.omit_patch_bytes = omit_patch_bytes
+        self.commits = {}
+
+    def add_commit(self, repo, sha, files):
+        self.commits[(repo, sha)] = files
+
+    def handle(self, handler, method, url, body):
+        match = self._COMMIT_RE.match(url.path)
+        files = self.commits.get(match.groups()) if match and method == "GET" else None
+        if files is None:
+            self.send_json(handler, 404, {"message": "Not Found"})
+            return
+
+        repo, sha = match.groups()
+        if handler.headers.get("Accept") == "application/vnd.github.sha":
+            self.send_bytes(handler, 200, sha.encode("utf-8"), "text/plain; charset=utf-8")
+            return
+        if handler.headers.get("Accept") == "application/vnd.github.diff":
+            raw = "".join(
+                f"diff --git a/{f['filename']} b/{f['filename']}\nindex 1111111..2222222 100644\n"
+                f"--- a/{f['filename']}\n+++ b/{f['filename']}\n{f['patch']}\n"
+                for f in files
+            )
+            self.send_bytes(handler, 200, raw.encode("utf-8"), "text/plain; charset=utf-8")
+            return
+
+        query = parse_qs(url.query)
+        per_page = min(100, int(query.get("per_page", ["30"])[0]))
+        page = int(query.get("page", ["1"])[0])
+        page_files = []
+        for f in files[(page - 1) * per_page:page * per_page]:
+            item = {"filename": f["filename"], "status": f["status"], "changes": f["patch"].count("\n") + 1}
+            if len(f["patch"]) <= self.omit_patch_bytes:
+                item["patch"] = f["patch"]
+            page_files.append(item)
+
+        headers = {}
+        if page * per_page < len(files):
+            headers["Link"] = f'<{self.url}{url.path}?per_page={per_page}&page={page + 1}>; rel="next"'
+        self.send_json(handler, 200, {"sha": sha, "parents": [{"sha": "0" * 40}], "files": page_files},
+                       headers=headers)
+
+
+# 🧠 OpenAI
+def make_summary(lines=60):
+    """
+    make_prompt 형식을 닮은 Markdown 학습 요약(헤딩, 목록, 코드 블록, 체크리스트)을 만듭니다.
+    """
+    out = ["# 학습 요약", "", "## 1. 무엇을 했나요? (What)"]
+    section = 2
+    while len(out) < lines:
+        if len(out) % 20 == 0:
+            out += ["", f"## {section}. 섹션 {section}"]
+            section += 1
+        elif len(out) % 13 == 0:
+            out += ["```python", "def handler(value):", "    return compute(value, retries=3)", "```"]
+        elif len(out) % 7 == 0:
+            out.append(f"- [ ] **체크 {len(out)}**: 핵심 로직의 흐름을 설명할 수 있는가?")
+        else:
+            out.append(f"- **변경 {len(out)}**: `compute()`에 `timeout` 인자를 추가해 느린 호출을 끊도록 했습니다.")
+    return "\n".join(out)
+
+
+class FakeOpenAI(FakeService):
+    """
+    POST /v1/chat/completions (stream 포함)
+    - latency 뒤에 completion 토큰마다 token_latency만큼 더 기다립니다.
+    - prompt 토큰 수는 메시지의 UTF-8 바이트 수 / 4로 계산합니다. (token_utils의 대략 추정과 같은 방식)
+    - 실제 prompt caching처럼, 이전 요청과 같은 앞부분을 1024토큰부터 128토큰 단위로
+      usage.prompt_tokens_details.cached_tokens에 돌려줍니다.
+
+    Batch API
+    POST /v1/files (purpose=batch), GET /v1/files/{id}/content
+    POST /v1/batches, GET /v1/batches, GET /v1/batches/{id}
+    - 배치는 batch_latency초 뒤 조회할 때 완료되고, 결과 줄 순서는 실제처럼 입력 순서와 다릅니다.
+    - batch_fail_every: N번째 요청마다 error 파일로 실패 결과를 보냅니다.
+    - batch_expire_after: 배치마다 앞의 N개 요청만 처리하고 expired로 끝냅니다. (이어서 제출하기 시험용)
+    """
+
+    name = "openai"
+    CACHE_MIN_TOKENS = 1024
+    CACHE_STEP_TOKENS = 128
+    _FILE_CONTENT_RE = re.compile(r"^/v1/files/([^/]+)/content$")
+    _BATCH_RE = re.compile(r"^/v1/batches/([^/]+)$")
+
+    def __init__(self, token_latency=0.0, summary_lines=60, batch_latency=0.0, batch_fail_every=0,
+                 batch_expire_after=None, **kwargs):
+        super().__init__(**kwargs)
+        self.token_latency = token_latency
+        self.summary = make_summary(summary_lines)
+        self.prefixes = set()
+        self.batch_latency = batch_latency
+        self.batch_fail_every = batch_fail_every
+        self.batch_expire_after = batch_expire_after
+        self.files = {}
+        self.batches = {}
+
+    def cached_tokens(self, model, data):
+        """
+        data(바이트)의 앞부분 중 이전 요청에서 본 가장 긴 prefix의 토큰 수를 돌려주고, 이번 prefix들을 기억합니다.
+        """
+        step = self.CACHE_STEP_TOKENS * 4
+        digest, cached = hashlib.sha256(model.encode("utf-8")), 0
+        for end in range(step, len(data) + 1, step):
+            digest.update(data[end - step:end])
+            if end < self.CACHE_MIN_TOKENS * 4:
+                continue
+            key = digest.copy().digest()
+            with self.lock:
+                if key in self.prefixes:
+                    cached = end // 4
+                else:
+                    self.prefixes.add(key)
+        return cached
+
+    def completion(self, request):
+        """
+        chat.completions 요청 하나에 대한 (응답 공통 필드, usage, completion 단어 목록)을 만듭니다.
+        """
+        data = "".join(m["content"] for m in request["messages"]).encode("utf-8")
+        prompt_tokens = len(data) // 4
+        words = re.findall(r"\S+\s*", self.summary)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                 "total_tokens": prompt_tokens + len(words),
+                 "prompt_tokens_details": {"cached_tokens": self.cached_tokens(request["model"], data)}}
+        base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": request["model"]}
+        return base, usage, words
+
+    def completion_body(self, request):
+        base, usage, _ = self.completion(request)
+        return {**base, "object": "chat.completion",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": self.summary}}],
+                "usage": usage}
+
+    def handle(self, handler, method, url, body):
+        if url.path.startswith(("/v1/files", "/v1/batches")):
+            self.handle_batch_api(handler, method, url, body)
+            return
+        if method != "POST" or url.path != "/v1/chat/completions":
+            self.send_json(handler, 404, {"error": {"message": "Not Found"}})
+            return
+
+        request = json.loads(body)
+        if not request.get("stream"):
+            response = self.completion_body(request)
+            time.sleep(self.token_latency * response["usage"]["completion_tokens"])
+            self.send_json(handler, 200, response)
+            return
+
+        base, usage, words = self.completion(request)
+
+        # Server-Sent Events를 chunked 전송으로 흘려보냄
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def send_event(payload):
+            data = f"data: {payload}\n\n".encode("utf-8")
+            handler.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            with self.lock:
+                self.stats["bytes_out"] += len(data)
+
+        for word in words:
+            time.sleep(self.token_latency)
+            send_event(json.dumps({**base, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "delta": {"content": word}, "finish_reason": None}]}, ensure_ascii=False))
+        if (request.get("stream_options") or {}).get("include_usage"):
+            send_event(json.dumps({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage}))
+        send_event("[DONE]")
+        handler.wfile.write(b"0\r\n\r\n")
+
+    # --- Batch API ---
+    def handle_batch_api(self, handler, method, url, body):
+        if method == "POST" and url.path == "/v1/files":
+            # multipart/form-data에서 file, purpose 필드를 꺼냄
+            message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+                b"Content-Type: " + handler.headers["Content-Type"].encode("latin-1") + b"\r\n\r\n" + body)
+            fields = {part.get_param("name", header="content-disposition"): part
+                      for part in message.iter_parts()}
+            data = fields["file"].get_payload(decode=True)
+            with self.lock:
+                file_id = f"file-{len(self.files) + 1}"
+                self.files[file_id] = data
+            self.send_json(handler, 200, {
+                "id": file_id, "object": "file", "bytes": len(data), "created_at": int(time.time()),
+                "filename": fields["file"].get_filename(), "status": "processed",
+                "purpose": fields["purpose"].get_payload(decode=True).decode("utf-8"),
+            })
+            return
+
+        match = self._FILE_CONTENT_RE.match(url.path)
+        if method == "GET" and match:
+            data = self.files.get(match.group(1))
+            if data is None:
+                self.send_json(handler, 404, {"error": {"message": "No such File object"}})
+            else:
+                self.send_bytes(handler, 200, data, "application/octet-stream")
+            return
+
+        if method == "POST" and url.path == "/v1/batches":
+            request = json.loads(body)
+            if request["input_file_id"] not in self.files:
+                self.send_json(handler, 400, {"error": {"message": "Invalid input_file_id"}})
+                return
+            total = self.files[request["input_file_id"]].count(b"\n")
+            with self.lock:
+                batch = {
+                    "id": f"batch_{len(self.batches) + 1}", "object": "batch", "endpoint": request["endpoint"],
+                    "errors": None, "input_file_id": request["input_file_id"],
+                    "completion_window": request["completion_window"], "status": "validating",
+                    "output_file_id": None, "error_file_id": None, "created_at": int(time.time()),
+                    "request_counts": {"total": total, "completed": 0, "failed": 0},
+                    "metadata": request.get("metadata"), "_started": time.monotonic(),
+                }
+                self.batches[batch["id"]] = batch
+            self.send_json(handler, 200, self._public(batch))
+            return
+
+        if method == "GET" and url.path == "/v1/batches":
+            # 최신순
+            data = [self._public(self._advance(b)) for b in reversed(list(self.batches.values()))]
+            self.send_json(handler, 200, {"object": "list", "data": data, "has_more": False,
+                                          "first_id": data[0]["id"] if data else None,
+                                          "last_id": data[-1]["id"] if data else None})
+            return
+
+        match = self._BATCH_RE.match(url.path)
+        if method == "GET" and match and match.group(1) in self.batches:
+            self.send_json(handler, 200, self._public(self._advance(self.batches[match.group(1)])))
+            return
+        self.send_json(handler, 404, {"error": {"message": "Not Found"}})
+
+    @staticmethod
+    def _public(batch):
+        return {k: v for k, v in batch.items() if not k.startswith("_")}
+
+    def _advance(self, batch):
+        """
+        조회 시점에 배치 상태를 진행시키고, batch_latency가 지났으면 결과 파일을 만듭니다.
+        """
+        with self.lock:
+            if batch["status"] not in ("validating", "in_progress"):
+                return batch
+            if time.monotonic() - batch["_started"] < self.batch_latency:
+                batch["status"] = "in_progress"
+                return batch
+            lines = self.files[batch["input_file_id"]].decode("utf-8").splitlines()
+
+        limit = self.batch_expire_after if self.batch_expire_after is not None else len(lines)
+        outputs, errors = [], []
+        for i, line in enumerate(lines[:limit], 1):
+            request = json.loads(line)
+            result = {"id": f"batch_req_{i}", "custom_id": request["custom_id"]}
+            if self.batch_fail_every and i % self.batch_fail_every == 0:
+                errors.append({**result, "response": {"status_code": 500, "request_id": f"req_{i}", "body": {
+                    "error": {"message": "fake batch error", "type": "server_error"}}}, "error": None})
+            else:
+                outputs.append({**result, "response": {"status_code": 200, "request_id": f"req_{i}",
+                                                       "body": self.completion_body(request["body"])},
+                                "error": None})
+        # 실제 Batch API처럼 결과 순서는 입력 순서를 보장하지 않음
+        random.Random(batch["id"]).shuffle(outputs)
+
+        with self.lock:
+            for kind, rows in (("output_file_id", outputs), ("error_file_id", errors)):
+                if rows:
+                    file_id = f"file-{len(self.files) + 1}"
+                    self.files[file_id] = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+                    batch[kind] = file_id
+            batch["request_counts"] = {"total": len(lines), "completed": len(outputs), "failed": len(errors)}
+            batch["status"] = "expired" if limit < len(lines) else "completed"
+        return batch
+
+
+# 📝 Notion
+class FakeNotion(FakeService):
+    """
+    PATCH  /v1/blocks/{id}/children  블록 추가 (after로 중간 삽입, 100개 초과 시 400 - 실제 Notion 제한)
+    GET    /v1/blocks/{id}/children  블록 조회 (page_size / start_cursor 페이지네이션, 커서는 블록 ID)
+    PATCH  /v1/blocks/{id}           블록 내용 수정
+    DELETE /v1/blocks/{id}           블록 삭제 (이미 삭제된 블록은 400)
+    추가한 블록의 created_by는 토큰마다 다른 사용자 ID입니다. (다른 토큰으로 쓴 블록 = 사용자가 직접 쓴 내용)
+    에러 응답은 notion_client가 APIResponseError로 해석하는 형식을 따릅니다.
+    """
+
+    name = "notion"
+    _CHILDREN_RE = re.compile(r"^/v1/blocks/([^/]+)/children$")
+    _BLOCK_RE = re.compile(r"^/v1/blocks/([^/]+)$")
+    _ERROR_CODES = {429: "rate_limited", 503: "service_unavailable", 409: "conflict_error"}
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.pages = {}
+        self.parents = {}  # 블록 ID -> 페이지 ID
+        self.archived = set()
+        self.next_id = 0
+
+    def send_error(self, handler, status):
+        self.send_json(handler, status, {"object": "error", "status": status,
+                                         "code": self._ERROR_CODES.get(status, "internal_server_error"),
+                                         "message": "fake error"},
+                       headers={"Retry-After": str(self.retry_after)})
+
+    def _reject(self, handler, status, code, message):
+        self.send_json(handler, status, {"object": "error", "status": status, "code": code, "message": message})
+
+    def handle(self, handler, method, url, body):
+        match = self._CHILDREN_RE.match(url.path)
+        if match and method == "PATCH":
+            self._append(handler, match.group(1), json.loads(body))
+        elif match and method == "GET":
+            self._list(handler, match.group(1), parse_qs(url.query))
+        elif self._BLOCK_RE.match(url.path) and method in ("PATCH", "DELETE"):
+            block_id = self._BLOCK_RE.match(url.path).group(1)
+            self._edit(handler, block_id, json.loads(body) if method == "PATCH" else None)
+        else:
+            self._reject(handler, 404, "object_not_found", "Not Found")
+
+    def _append(self, handler, page_id, request):
+        children = request.get("children", [])
+        author = {"object": "user",
+                  "id": hashlib.sha256(handler.headers.get("Authorization", "").encode("utf-8")).hexdigest()[:32]}
+        if len(children) > 100:
+            self._reject(handler, 400, "validation_error", "body.children.length should be ≤ 100")
+            return
+        with self.lock:
+            blocks = self.pages.setdefault(page_id, [])
+            ids = [b["id"] for b in blocks]
+            after = request.get("after")
+            if after is not None and after not in ids:
+                position = None
+            else:
+                position = ids.index(after) + 1 if after is not None else len(blocks)
+            added = []
+            if position is not None:
+                for child in children:
+                    self.next_id += 1
+                    block_id = f"block-{self.next_id}"
+                    added.append({**child, "id": block_id, "object": "block", "created_by": author,
+                                  "has_children": False})
+                    self.parents[block_id] = page_id
+                blocks[position:position] = added
+        if position is None:
+            self._reject(handler, 400, "validation_error", "after block not found")
+            return
+        self.send_json(handler, 200, {"object": "list", "results": added, "has_more": False,
+                                      "next_cursor": None})
+
+    def _list(self, handler, page_id, query):
+        page_size = min(100, int(query.get("page_size", ["100"])[0]))
+        cursor = query.get("start_cursor", [None])[0]
+        with self.lock:
+            blocks = list(self.pages.get(page_id, []))
+        ids = [b["id"] for b in blocks]
+        if cursor is not None and cursor not in ids:
+            self._reject(handler, 400, "validation_error", "start_cursor is invalid")
+            return
+        start = ids.index(cursor) if cursor is not None else 0
+        chunk = blocks[start:start + page_size]
+        more = start + page_size < len(blocks)
+        self.send_json(handler, 200, {"object": "list", "results": chunk, "has_more": more,
+                                      "next_cursor": ids[start + page_size] if more else None})
+
+    def _edit(self, handler, block_id, request):
+        with self.lock:
+            if block_id in self.archived:
+                result = (400, "validation_error", "Can't edit block that is archived.")
+            elif block_id not in self.parents:
+                result = (404, "object_not_found", "Not Found")
+            else:
+                blocks = self.pages[self.parents[block_id]]
+                index = next(i for i, b in enumerate(blocks) if b["id"] == block_id)
+                if request is None:
+                    self.archived.add(block_id)
+                    result = {**blocks.pop(index), "archived": True}
+                else:
+                    block_type = blocks[index]["type"]
+                    if block_type not in request:
+                        result = (400, "validation_error", f"body.{block_type} should be defined")
+                    else:
+                        blocks[index] = result = {**blocks[index], block_type: request[block_type]}
+        if isinstance(result, tuple):
+            self._reject(handler, *result)
+        else:
+            self.send_json(handler, 200, result)
@@ -0,0 +1,127 @@
+# 파일명: benchmarks/webhook_smoke.py
+# 실행: python benchmarks/webhook_smoke.py
+#
+# 웹훅 서버(make_handler + JournalQueue)를 로컬 포트에 띄우고, 서명한 push payload를 보내
+# 응답 코드가 예상과 같은지 확인합니다. GitHub/OpenAI/Notion에는 요청하지 않습니다.
+# (커밋 처리 함수는 대기열이 비지 않도록 붙잡아 두기만 하므로 429 경로까지 확인할 수 있음)
+#
+# 확인하는 경로
+#   서명 없음/틀린 서명 → 401, ping → 200, push가 아닌 이벤트 → 202 ignored
+#   빈 대기열에 상한보다 큰 push → 202 queued, 같은 push 다시 → 202 duplicates, 밀린 대기열 상한 초과 → 429
+#   JSON 객체가 아닌 본문, 필드 누락/타입 오류, 잘못된 Content-Length → 400
+
+import argparse
+import hashlib
+import hmac
+import http.client
+import json
+import os
+import sys
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SECRET = "smoke-secret"
+
+
+def sign(secret, body):
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def push_payload(repo, shas):
+    return {
+        "ref": "refs/heads/main",
+        "repository": {"full_name": repo},
+        "commits": [{"id": sha, "distinct": True, "message": f"commit {sha[:7]}"} for sha in shas],
+    }
+
+
+def post(url, payload, event="push", secret=SECRET, signature=None, content_length=None):
+    """
+    payload(dict/list면 JSON으로, bytes면 그대로)를 보내고 (상태 코드, 응답 JSON)을 반환합니다.
+    content_length를 주면 실제 길이 대신 그 값을 Content-Length 헤더로 보냅니다.
+    """
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+    if signature is None and secret:
+        signature = sign(secret, body)
+    target = urllib.parse.urlsplit(url)
+    conn = http.client.HTTPConnection(target.hostname, target.port, timeout=10)
+    try:
+        conn.putrequest("POST", target.path)
+        conn.putheader("Content-Type", "application/json")
+        conn.putheader("Content-Length", str(len(body)) if content_length is None else content_length)
+        conn.putheader("X-GitHub-Event", event)
+        if signature:
+            conn.putheader("X-Hub-Signature-256", signature)
+        conn.endheaders(body)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def cases(max_pending):
+    # (이름, post 인자, 예상 상태 코드, 응답에서 확인할 값)
+    # 첫 push는 상한보다 1개 많게 보냄 → 빈 대기열은 모두 받고, 워커가 하나를 꺼내도 상한만큼 밀려 있음
+    shas = [f"{i:040x}" for i in range(1, 2 * max_pending + 3)]
+    first, overflow = shas[:max_pending + 1], shas[max_pending + 1:]
+    return [
+        ("서명 없음", dict(payload=push_payload("smoke/repo", first), secret=None), 401, {}),
+        ("틀린 서명", dict(payload=push_payload("smoke/repo", first), signature="sha256=" + "0" * 64), 401, {}),
+        ("ping", dict(payload={"zen": "Keep it simple."}, event="ping"), 200, {"status": "pong"}),
+        ("다른 이벤트", dict(payload={"action": "opened"}, event="issues"), 202, {"status": "ignored"}),
+        ("빈 대기열에는 상한보다 큰 push도 받음", dict(payload=push_payload("smoke/repo", first)), 202,
+         {"queued": len(first), "duplicates": 0}),
+        ("같은 push 다시", dict(payload=push_payload("smoke/repo", first)), 202, {"queued": 0, "duplicates": len(first)}),
+        ("밀린 대기열 상한 초과", dict(payload=push_payload("smoke/repo", overflow)), 429, {}),
+        ("다른 저장소는 계속 받음", dict(payload=push_payload("smoke/other", overflow[:1])), 202, {"queued": 1}),
+        ("배열 본문", dict(payload=[1, 2]), 400, {}),
+        ("JSON 아님", dict(payload=b"not json"), 400, {}),
+        ("repository 없음", dict(payload={"commits": []}), 400, {}),
+        ("commits가 객체 배열이 아님", dict(payload={"repository": {"full_name": "smoke/repo"}, "commits": [1]}), 400, {}),
+        ("commit id가 숫자", dict(payload={"repository": {"full_name": "smoke/repo"}, "commits": [{"id": 1}]}), 400, {}),
+        ("Content-Length가 숫자가 아님", dict(payload={"zen": "x"}, event="ping", content_length="abc"), 400, {}),
+        ("Content-Length가 음수", dict(payload={"zen": "x"}, event="ping", content_length="-1"), 400, {}),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Post signed push payloads to a local webhook server")
+    parser.add_argument("--max-pending", type=int, default=3, help="리포지토리별 대기열 상한 (429 확인용)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import webhook_server
+
+    # 확인이 끝날 때까지 커밋 처리를 붙잡아 두어 대기열이 차 있도록 함
+    release = threading.Event()
+    queue = webhook_server.JournalQueue(lambda repo, sha: release.wait(), max_workers=2,
+                                        max_pending_per_repo=args.max_pending)
+    handler = webhook_server.make_handler(queue, SECRET)
+    handler.log_message = lambda *_: None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/webhook"
+
+    failures = 0
+    try:
+        for name, kwargs, expected_status, expected_body in cases(args.max_pending):
+            status, body = post(url, **kwargs)
+            ok = status == expected_status and all(body.get(k) == v for k, v in expected_body.items())
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {name}: {status} {json.dumps(body, ensure_ascii=False)}")
+    finally:
+        release.set()
+        server.shutdown()
+        server.server_close()
+        queue.wait_idle(timeout=10)
+        queue.shutdown()
+
+    if failures:
+        raise SystemExit(f"❌ {failures}개 경로가 예상과 다르게 응답했습니다.")
+    print("✅ 모든 경로가 예상대로 응답했습니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# 파일명: diff_filter.py
+
+import fnmatch
+import math
+import os
+import re
+
+import metrics
+import token_utils
+
+# 🧹 프롬프트를 만들기 전에 가치가 낮은 변경 내역을 걸러내고, 중요한 hunk부터 정렬합니다.
+# - lockfile, 압축(minified) 파일, 빌드 결과물, vendor 폴더, 데이터 파일 → 한 줄 안내로 축약
+# - 공백/들여쓰기만 바뀐 hunk → 제외
+# - 남은 hunk는 중요도 점수 순으로 정렬하고, max_tokens가 있으면 점수가 낮은 것부터 버림
+
+DEFAULT_EXCLUDE_GLOBS = [
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock",
+    "Cargo.lock", "composer.lock", "Gemfile.lock", "go.sum", "uv.lock",
+    "*.min.js", "*.min.css", "*.map", "*.bundle.js",
+    "node_modules/*", "vendor/*", "third_party/*", "dist/*", "build/*", "__pycache__/*",
+    "*.csv", "*.tsv", "*.parquet", "*.pkl", "*.h5", "*.svg", "*.lock",
+    "*_pb2.py", "*.pb.go", "*.generated.*",
+]
+# 어느 깊이에 있어도 통째로 생성물인 폴더 (그 밖의 "폴더/*" 패턴은 저장소 최상위 기준)
+ANY_DEPTH_DIRS = {"node_modules", "__pycache__"}
+# 추가로 제외할 패턴 (쉼표로 구분). 예: DIFF_EXCLUDE_GLOBS="docs/*,*.snap"
+EXTRA_EXCLUDE_GLOBS = [g.strip() for g in os.getenv("DIFF_EXCLUDE_GLOBS", "").split(",") if g.strip()]
+
+# 전체 diff 토큰 상한 (0이면 제한 없음, 큰 커밋은 message.py의 map-reduce 요약이 처리)
+MAX_DIFF_TOKENS = int(os.getenv("DIFF_MAX_TOKENS", 0)) or None
+
+# 생성 도구가 파일 맨 위에 넣는 표시 (Go의 "Code generated ... DO NOT EDIT.", protoc/Buck의 @generated 등)
+GENERATED_MARKERS = ("@generated", "DO NOT EDIT")
+GENERATED_HEADER_LINES = 5  # 파일 첫 몇 줄에서만 표시를 찾음 (본문 주석의 "generated by"는 무시)
+FILE_HEAD_HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+1(?:,\d+)? @@")
+MINIFIED_LINE_LENGTH = 500  # 추가된 줄의 평균 길이가 이보다 길면 압축/생성 파일로 판단
+
+CODE_EXTENSIONS = {".py", ".ipynb", ".js", ".jsx", ".ts", ".tsx", ".java", ".kt", ".go", ".rs", ".c",
+                   ".cc", ".cpp", ".h", ".hpp", ".cs", ".rb", ".php", ".swift", ".scala", ".sql", ".sh"}
+DOC_EXTENSIONS = {".md", ".rst", ".txt"}
+CONFIG_EXTENSIONS = {".json", ".yml", ".yaml", ".toml", ".ini", ".cfg", ".xml", ".env"}
+TEST_FILE_RE = re.compile(r"(^|/)(tests?/|test_[^/]*$|[^/]*_test\.[^/]*$|[^/]*\.(test|spec)\.[^/]*$)")
+KEYWORD_RE = re.compile(r"^\+\s*(def |class |async def |function |export |public |private |func |fn |impl |interface )")
+
+
+def _glob_match(path, glob):
+    """
+    fnmatch의 *는 /까지 포함하므로 경로 조각 단위로 비교합니다.
+    - "dir/*" 처럼 /*로 끝나는 패턴: 저장소 최상위의 그 폴더 아래 모든 파일
+      (ANY_DEPTH_DIRS 폴더는 어느 깊이에 있어도 해당, src/build/처럼 안쪽의 같은 이름 폴더는 제외하지 않음)
+    - 그 밖에 /가 있는 패턴: 조각 수가 같은 경로만
+    - /가 없는 패턴: 파일 이름
+    """
+    parts, pattern = path.split("/"), glob.split("/")
+    if glob.endswith("/*"):
+        prefix = pattern[:-1]
+        if len(parts) > len(prefix) and all(fnmatch.fnmatch(p, g) for p, g in zip(parts, prefix)):
+            return True
+        return len(prefix) == 1 and prefix[0] in ANY_DEPTH_DIRS and prefix[0] in parts[:-1]
+    if len(pattern) > 1:
+        return len(parts) == len(pattern) and all(fnmatch.fnmatch(p, g) for p, g in zip(parts, pattern))
+    return fnmatch.fnmatch(parts[-1], glob)
+
+
+def _matches(path, globs):
+    return any(_glob_match(path, g) for g in globs)
+
+
+def _line_counts(patch):
+    adds = sum(1 for line in patch.splitlines() if line.startswith("+") and not line.startswith("+++"))
+    dels = sum(1 for line in patch.splitlines() if line.startswith("-") and not line.startswith("---"))
+    return adds, dels
+
+
+def _generated_reason(patch):
+    lines = patch.splitlines()
+    added = [line[1:] for line in lines if line.startswith("+")]
+    if not added:
+        return None
+    # 새 파일 기준 1번째 줄부터 시작하는 hunk(-0,0 +1 또는 파일 맨 위를 고친 hunk)만 파일 머리로 봄
+    if lines and FILE_HEAD_HUNK_RE.match(lines[0]):
+        header = [line[1:] for line in lines[1:] if not line.startswith(("-", "\\"))][:GENERATED_HEADER_LINES]
+        if any(marker in line for line in header for marker in GENERATED_MARKERS):
+            return "자동 생성 파일"
+    if sum(len(line) for line in added) / len(added) > MINIFIED_LINE_LENGTH:
+        return "압축(minified) 파일"
+    return None
+
+
+def is_whitespace_only(hunk):
+    """
+    hunk의 이전 쪽(문맥 + 삭제 줄)과 이후 쪽(문맥 + 추가 줄)이 공백을 빼면 줄 단위로 같은지 확인합니다.
+    (줄 순서만 바뀐 hunk는 동작이 달라지므로 공백 변경으로 보지 않음)
+    """
+    old, new, changed = [], [], False
+    for line in hunk.splitlines():
+        if line.startswith(("@@", "\\")):
+            continue
+        text = "".join(line[1:].split())
+        if line.startswith("-"):
+            changed = True
+            old.append(text)
+        elif line.startswith("+"):
+            changed = True
+            new.append(text)
+        else:
+            old.append(text)
+            new.append(text)
+    # 빈 줄 추가/삭제도 공백 변경으로 봄
+    return changed and [t for t in old if t] == [t for t in new if t]
+
+
+def score_hunk(filename, hunk):
+    """
+    hunk의 중요도 점수. 코드 파일 > 문서 > 설정 파일 순으로 가중치를 주고,
+    의미 있는 변경 줄 수와 함수/클래스 정의 여부를 반영합니다. 테스트 코드는 조금 낮춥니다.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in CODE_EXTENSIONS:
+        weight = 3.0
+    elif ext in DOC_EXTENSIONS:
+        weight = 1.0
+    elif ext in CONFIG_EXTENSIONS:
+        weight = 0.7
+    else:
+        weight = 1.0
+    if TEST_FILE_RE.search(filename.lower()):
+        weight *= 0.8
+
+    meaningful = keywords = 0
+    for line in hunk.splitlines():
+        if line[:1] in "+-" and line[1:].strip() and not line[1:].strip().startswith(("#", "//")):
+            meaningful += 1
+        if KEYWORD_RE.match(line):
+            keywords += 1
+    return weight * (math.sqrt(meaningful) + 2 * keywords)
+
+
+def filter_changes(changes, exclude_globs=None, max_tokens=MAX_DIFF_TOKENS, model="gpt-4o"):
+    """
+    변경 내역 리스트를 걸러내고 정렬해서 (새 변경 내역 리스트, 리포트)를 반환합니다.
+    - exclude_globs: 축약할 파일 패턴 (기본값 DEFAULT_EXCLUDE_GLOBS + DIFF_EXCLUDE_GLOBS 환경 변수)
+    - max_tokens: 남은 hunk의 토큰 합이 이 값을 넘으면 점수가 낮은 hunk부터 제외 (기본값 DIFF_MAX_TOKENS 환경 변수)
+    리포트: {"tokens_before", "tokens_after", "tokens_saved", "collapsed", "whitespace_hunks", "dropped_hunks"}
+    """
+    if exclude_globs is None:
+        exclude_globs = DEFAULT_EXCLUDE_GLOBS + EXTRA_EXCLUDE_GLOBS
+
+    report = {"tokens_before": 0, "tokens_after": 0, "tokens_saved": 0,
+              "collapsed": [], "whitespace_hunks": 0, "dropped_hunks": 0}
+    collapsed, hunks = [], []  # hunks: (점수, 파일 순서, hunk 순서, change, hunk 텍스트, 토큰 수)
+
+    for file_index, c in enumerate(changes):
+        report["tokens_before"] += token_utils.count_tokens(c['patch'], model)
+        reason = "제외 패턴" if _matches(c['filename'], exclude_globs) else _generated_reason(c['patch'])
+        if reason:
+            adds, dels = _line_counts(c['patch'])
+            collapsed.append({**c, 'patch': f"(생략됨: {reason}, +{adds}/-{dels} 줄)"})
+            report["collapsed"].append(f"{c['filename']} ({reason})")
+            continue
+        for hunk_index, hunk in enumerate(token_utils.split_hunks(c['patch'])):
+            if is_whitespace_only(hunk):
+                report["whitespace_hunks"] += 1
+                continue
+            tokens = token_utils.count_tokens(hunk, model)
+            hunks.append((score_hunk(c['filename'], hunk), file_index, hunk_index, c, hunk, tokens))
+
+    # 중요한 hunk부터 예산을 채움
+    hunks.sort(key=lambda h: (-h[0], h[1], h[2]))
+    kept, used = [], 0
+    for h in hunks:
+        if max_tokens is not None and used + h[5] > max_tokens:
+            report["dropped_hunks"] += 1
+            continue
+        kept.append(h)
+        used += h[5]
+
+    # 파일은 가장 중요한 hunk 순서로, 같은 파일 안의 hunk는 원래 순서대로 다시 묶음
+    by_file = {}
+    for h in kept:
+        by_file.setdefault(h[1], []).append(h)
+    result = []
+    for file_hunks in by_file.values():
+        file_hunks.sort(key=lambda h: h[2])
+        c = file_hunks[0][3]
+        result.append({**c, 'patch': "".join(h[4] if h[4].endswith("\n") else h[4] + "\n"
+                                             for h in file_hunks).rstrip("\n")})
+    result.extend(collapsed)
+
+    report["tokens_after"] = sum(token_utils.count_tokens(c['patch'], model) for c in result)
+    report["tokens_saved"] = max(0, report["tokens_before"] - report["tokens_after"])
+    metrics.record("diff_filter", tokens_before=report["tokens_before"], tokens_saved=report["tokens_saved"])
+    return result, report
+
+
+def format_report(report):
+    before, saved = report["tokens_before"], report["tokens_saved"]
+    ratio = saved / before if before else 0
+    parts = [f"diff 필터링: {before:,} → {report['tokens_after']:,} 토큰 ({saved:,} 토큰, {ratio:.0%} 절약)"]
+    if report["collapsed"]:
+        parts.append(f"축약 {len(report['collapsed'])}개 파일")
+    if report["whitespace_hunks"]:
+        parts.append(f"공백 변경 hunk {report['whitespace_hunks']}개 제외")
+    if report["dropped_hunks"]:
+        parts.append(f"예산 초과 hunk {report['dropped_hunks']}개 제외")
+    return " · ".join(parts)
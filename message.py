@@ -1,16 +1,23 @@
 # !pip install openai nbformat astor pyperclip nbconvert markdown requests python-dotenv
 
 import os
-import nbformat
-from nbconvert import PythonExporter
-from openai import OpenAI
 import datetime
-import pyperclip
+import functools
+import time
 import textwrap
-import markdown
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import hashlib
+import json
 from dotenv import load_dotenv
 import streamlit as st
+import summary_cache
+import token_utils
+import notebook_diff
+import diff_filter
+import metrics
 
 # 🔑 1. API Key 불러오기
 load_dotenv()
@@ -18,14 +25,24 @@ load_dotenv()
 # with open("./key/.openai_api_key") as f:
 #     api_key = f.read().strip()
 
-# Streamlit Secrets
-api_key = st.secrets["OPENAI_API_KEY"]
 
-client = OpenAI(api_key=api_key)
+# Streamlit은 위젯을 조작할 때마다 app.py를 다시 실행하므로,
+# 무거운 openai 패키지 import와 클라이언트 생성은 처음 LLM을 호출할 때 한 번만 합니다.
+@functools.lru_cache(maxsize=1)
+def get_client():
+    from openai import OpenAI
+
+    # 환경 변수(.env)가 없으면 Streamlit Secrets 사용
+    api_key = os.getenv("OPENAI_API_KEY") or st.secrets["OPENAI_API_KEY"]
+    return OpenAI(api_key=api_key)
 
 # 📂 2. 코드 + 마크다운 불러오기 함수
 def load_code(file_path):
     if file_path.endswith(".ipynb"):
+        # CLI 전용 의존성은 필요할 때만 import
+        import nbformat
+        from nbconvert import PythonExporter
+
         with open(file_path, encoding="utf-8") as f:
             nb = nbformat.read(f, as_version=4)
         exporter = PythonExporter()
@@ -37,105 +54,646 @@ def load_code(file_path):
         raise ValueError("지원하지 않는 파일 형식입니다.")
 
 # 📝 3. 학습 요약 템플릿
+# OpenAI는 요청 앞부분(1024토큰 이상)이 이전 요청과 똑같으면 그 부분을 캐시해 더 빠르고 싸게 처리합니다.
+# 그래서 매번 같은 지시문·출력 형식을 앞(prefix)에, 커밋마다 달라지는 변경 내역을 맨 뒤(suffix)에 둡니다.
+SUMMARY_INSTRUCTIONS = textwrap.dedent("""
+아래 GitHub 커밋 변경 내역을 분석하여 학습 일지를 작성하세요.
+
+**분석 원칙:**
+1. 실제 변경된 코드만 다루고, 임의의 예제를 만들지 말 것
+2. 기술 용어는 한글로 설명하되 영문을 병기할 것 (예: "비동기 처리(Async)")
+3. 초보자도 이해할 수 있도록 "무엇을", "왜", "어떻게"를 명확히 설명
+4. 실무 시나리오와 연결하여 실용적인 인사이트 제공
+
+**변경 내역 읽는 법:**
+- 변경 내역은 맨 끝의 "--- 변경 내역 시작 ---"과 "--- 변경 내역 끝 ---" 사이에 있습니다.
+- 파일마다 "📄 파일명: 경로 (상태)" 줄로 시작하고, 상태는 added(추가), modified(수정), removed(삭제), renamed(이름 변경) 중 하나입니다.
+- 여러 커밋을 함께 요약할 때는 파일 앞에 "🔖 커밋: 해시" 줄이 붙습니다. 커밋별로 나누지 말고 전체 흐름을 하나의 학습 일지로 정리하세요.
+- 파일 내용은 unified diff 형식입니다. "@@"로 시작하는 줄은 변경 위치, "+"로 시작하는 줄은 추가된 코드, "-"로 시작하는 줄은 삭제된 코드, 나머지는 주변 문맥입니다.
+- Jupyter 노트북은 출력 없이 셀 소스만 비교하며, "@@ 셀 N (code) 수정 @@"처럼 셀 번호와 종류가 표시됩니다.
+- "(생략됨: 이유, +추가/-삭제 줄)"로 표시된 파일은 lockfile·생성 파일 등이라 내용을 뺀 것입니다. 내용을 추측하지 말고, 필요하면 변경 규모만 언급하세요.
+- 큰 커밋은 미리 부분별로 정리한 "### 부분 i/n" 메모로 주어집니다. 메모에 없는 내용은 지어내지 말고, 여러 부분의 내용을 하나의 이야기로 합쳐서 작성하세요.
+
+**출력 규칙 (결과는 Notion 블록으로 변환됩니다):**
+- 설명은 한국어로 작성하고, 함수명·클래스명·파일명·명령어 같은 식별자는 원문 그대로 `인라인 코드`로 표기하세요.
+- 제목은 #, ##, ### 세 단계까지만 사용하세요. 그보다 깊은 제목은 ###로 바뀝니다.
+- 목록은 한 단계로만 작성하세요. 들여쓴 하위 목록은 평평하게 펼쳐집니다.
+- 표(| 열 | 열 |)와 HTML 태그는 변환되지 않고 글자 그대로 보이므로 쓰지 마세요. 비교가 필요하면 bullet point로 나열하세요.
+- 코드 블록은 반드시 ```언어 이름(python, javascript, bash 등)으로 열고 ```로 닫으세요.
+- 굵게(**텍스트**), 기울임(*텍스트*), 인라인 코드(`코드`), 링크([텍스트](URL))만 사용하세요.
+- 형식에 없는 머리말이나 맺음말("요약은 다음과 같습니다" 등)은 붙이지 말고, 바로 "# 학습 요약"으로 시작하세요.
+
+아래 형식으로 학습 요약을 작성하세요:
+
+# 학습 요약
+
+## 1. 무엇을 했나요? (What)
+- **주제**: 이번 커밋에서 구현/수정한 핵심 기능을 한 문장으로 요약
+- **변경 사항**: 추가/수정/삭제된 주요 내용을 2-3개 bullet point로 정리
+
+## 2. 핵심 코드 (Key Code)
+```python
+# 실제 커밋에서 가장 중요한 코드 부분만 발췌 (10-15줄 이내)
+# import 문, 주석, 단순 변수 선언은 제외
+# 로직의 핵심만 포함
+```
+
+## 3. 어떻게 작동하나요? (How)
+위 코드가 어떻게 동작하는지 **단계별로 설명**:
+- **Step 1**: (첫 번째 동작)
+- **Step 2**: (두 번째 동작)
+- **Step 3**: (세 번째 동작)
+
+초보자도 이해할 수 있도록 각 단계를 구체적으로 서술하세요.
+
+## 4. 왜 이렇게 했나요? (Why)
+- **문제 상황**: 어떤 문제를 해결하기 위한 코드인가?
+- **선택 이유**: 왜 이 방법을 선택했는가? (다른 방법 대비 장점)
+- **핵심 개념**: 이 코드에서 사용된 핵심 개념/패턴은? (예: 의존성 주입, 비동기 처리 등)
+
+## 5. 실무에서는? (Real-world Application)
+실제 프로젝트에서 이 패턴/기술을 적용할 수 있는 **구체적인 시나리오 2-3개**:
+- 예시 1: (구체적인 상황과 적용 방법)
+- 예시 2: (구체적인 상황과 적용 방법)
+
+## 6. 더 알아보기 (Further Learning)
+- **관련 개념**: 추가로 학습하면 좋을 관련 기술/개념
+- **심화 질문**: 다음 단계로 고민해볼 질문 2-3개
+
+## 7. 체크리스트 (Self-check)
+- [ ] 이 코드의 목적을 한 문장으로 설명할 수 있는가?
+- [ ] 핵심 로직의 흐름을 그림으로 그릴 수 있는가?
+- [ ] 비슷한 문제를 만나면 이 패턴을 적용할 수 있는가?
+""")
+
+
 def make_prompt(code):
-    template = textwrap.dedent(f"""
-    아래 GitHub 커밋 변경 내역을 분석하여 학습 일지를 작성하세요.
-    
-    **분석 원칙:**
-    1. 실제 변경된 코드만 다루고, 임의의 예제를 만들지 말 것
-    2. 기술 용어는 한글로 설명하되 영문을 병기할 것 (예: "비동기 처리(Async)")
-    3. 초보자도 이해할 수 있도록 "무엇을", "왜", "어떻게"를 명확히 설명
-    4. 실무 시나리오와 연결하여 실용적인 인사이트 제공
-    
+    # 고정 지시문(prefix) 뒤에 변경 내역(suffix)만 붙임 → prefix가 모든 요청에서 글자 단위로 같아야 캐시됨
+    return f"{SUMMARY_INSTRUCTIONS}\n--- 변경 내역 시작 ---\n{code}\n--- 변경 내역 끝 ---\n"
+
+
+# 🧠 학습 요약 생성 (디스크 캐시 우선)
+# 웹 UI와 웹훅 서버가 함께 쓰는 기본 설정
+SUMMARY_MODEL = "gpt-4o"
+SUMMARY_SYSTEM_PROMPT = "너는 개발자의 학습을 돕는 코드 분석 전문가다. 주어진 형식에 맞춰 명확하고 실용적인 학습 요약을 작성한다."
+
+
+
+def prompt_hash(system_prompt):
+    """
+    시스템 메시지와 make_prompt 템플릿이 바뀌면 캐시도 새로 만들어지도록 해시를 계산합니다.
+    """
+    raw = system_prompt + "\x00" + make_prompt("")
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ✂️ 큰 커밋은 토큰 예산 단위로 나눠 요약(map) 후 합치기(reduce)
+CHUNK_TOKEN_BUDGET = int(os.getenv("CHUNK_TOKEN_BUDGET", 12000))
+MAX_LLM_WORKERS = 4  # 청크 요약을 동시에 보내는 개수
+MAX_REDUCE_ROUNDS = 3  # 정리본을 다시 나눠 정리하는 최대 횟수
+
+CHUNK_SYSTEM_PROMPT = "너는 코드 변경 내역을 정리하는 분석가다. 주어진 일부 diff만 사실대로 정리한다."
+
+
+def make_chunk_prompt(code):
+    return textwrap.dedent(f"""
+    아래는 하나의 큰 GitHub 커밋 변경 내역 중 일부입니다.
+    나중에 다른 부분의 정리와 합쳐 학습 일지를 만들 수 있도록 이 부분만 정리하세요.
+
+    - 파일별로 추가/수정/삭제된 핵심 내용을 bullet point로 정리
+    - 가장 중요한 코드는 원문 그대로 짧게 발췌 (파일당 10줄 이내, 코드 블록 사용)
+    - 변경 내역에 없는 내용은 추측하지 말 것
+
     --- 변경 내역 시작 ---
     {code}
     --- 변경 내역 끝 ---
-    
-    아래 형식으로 학습 요약을 작성하세요:
-    
-    # 학습 요약
-    
-    ## 1. 무엇을 했나요? (What)
-    - **주제**: 이번 커밋에서 구현/수정한 핵심 기능을 한 문장으로 요약
-    - **변경 사항**: 추가/수정/삭제된 주요 내용을 2-3개 bullet point로 정리
-    
-    ## 2. 핵심 코드 (Key Code)
-    ```python
-    # 실제 커밋에서 가장 중요한 코드 부분만 발췌 (10-15줄 이내)
-    # import 문, 주석, 단순 변수 선언은 제외
-    # 로직의 핵심만 포함
-    ```
-    
-    ## 3. 어떻게 작동하나요? (How)
-    위 코드가 어떻게 동작하는지 **단계별로 설명**:
-    - **Step 1**: (첫 번째 동작)
-    - **Step 2**: (두 번째 동작)
-    - **Step 3**: (세 번째 동작)
-    
-    초보자도 이해할 수 있도록 각 단계를 구체적으로 서술하세요.
-    
-    ## 4. 왜 이렇게 했나요? (Why)
-    - **문제 상황**: 어떤 문제를 해결하기 위한 코드인가?
-    - **선택 이유**: 왜 이 방법을 선택했는가? (다른 방법 대비 장점)
-    - **핵심 개념**: 이 코드에서 사용된 핵심 개념/패턴은? (예: 의존성 주입, 비동기 처리 등)
-    
-    ## 5. 실무에서는? (Real-world Application)
-    실제 프로젝트에서 이 패턴/기술을 적용할 수 있는 **구체적인 시나리오 2-3개**:
-    - 예시 1: (구체적인 상황과 적용 방법)
-    - 예시 2: (구체적인 상황과 적용 방법)
-    
-    ## 6. 더 알아보기 (Further Learning)
-    - **관련 개념**: 추가로 학습하면 좋을 관련 기술/개념
-    - **심화 질문**: 다음 단계로 고민해볼 질문 2-3개
-    
-    ## 7. 체크리스트 (Self-check)
-    - [ ] 이 코드의 목적을 한 문장으로 설명할 수 있는가?
-    - [ ] 핵심 로직의 흐름을 그림으로 그릴 수 있는가?
-    - [ ] 비슷한 문제를 만나면 이 패턴을 적용할 수 있는가?
     """)
-    return template
 
 
-# 📂 GitHub 커밋 변경 내역 가져오기
-def get_commit_changes(owner, repo, commit_hash, github_token=None):
+# 🧮 호출 전 입력 토큰 검사
+MAX_PROMPT_TOKENS = int(os.getenv("MAX_PROMPT_TOKENS", 100000))  # 요청 하나의 입력 토큰 상한 (넘으면 호출하지 않음)
+
+
+class PromptBudgetExceeded(ValueError):
+    pass
+
+
+def preflight(m, model, system_prompt, prompt, budget=None):
     """
-    특정 커밋에서 변경된 모든 파일의 diff 내용을 가져옵니다.
+    보내기 전에 입력 토큰 수를 세어 m["prompt_tokens_est"]에 기록하고,
+    budget(기본 MAX_PROMPT_TOKENS)을 넘으면 PromptBudgetExceeded를 던집니다.
+    """
+    budget = budget or MAX_PROMPT_TOKENS
+    tokens = token_utils.count_tokens(system_prompt, model) + token_utils.count_tokens(prompt, model)
+    m["prompt_tokens_est"] = tokens
+    if tokens > budget:
+        raise PromptBudgetExceeded(f"예상 입력 토큰 {tokens}개가 예산 {budget}개를 넘어 호출하지 않았습니다.")
+    return tokens
+
+
+def _record_usage(m, usage):
+    if usage is not None:
+        m["prompt_tokens"] = usage.prompt_tokens
+        m["completion_tokens"] = usage.completion_tokens
+        # 앞부분(prefix)이 이전 요청과 같아 OpenAI 캐시에서 처리된 입력 토큰 수
+        details = getattr(usage, "prompt_tokens_details", None)
+        m["cached_tokens"] = getattr(details, "cached_tokens", None) or 0
+
+
+def _chat(model, temperature, system_prompt, prompt, stage="llm_call"):
+    with metrics.stage(stage, model=model) as m:
+        preflight(m, model, system_prompt, prompt)
+        response = get_client().chat.completions.create(
+            model=model,
+            temperature=temperature,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ]
+        )
+        _record_usage(m, getattr(response, "usage", None))
+    return response.choices[0].message.content
+
+
+def _map_reduce_input(changes, model, temperature, token_budget):
+    """
+    변경 내역을 make_prompt에 넣을 텍스트로 만듭니다.
+    예산을 넘으면 청크별 정리를 병렬로 만든 뒤, 그 정리본이 예산 안에 들어올 때까지 반복합니다.
+    """
+    chunks = token_utils.chunk_changes(changes, token_budget, model, format_change=_format_change)
+    if len(chunks) <= 1:
+        return format_changes(changes)
+
+    for _ in range(MAX_REDUCE_ROUNDS):
+        with ThreadPoolExecutor(max_workers=min(MAX_LLM_WORKERS, len(chunks))) as pool:
+            notes = list(pool.map(
+                metrics.bind(lambda chunk: _chat(model, temperature, CHUNK_SYSTEM_PROMPT,
+                                                 make_chunk_prompt(chunk), stage="llm_map")),
+                chunks
+            ))
+        merged = "\n\n".join(f"### 부분 {i}/{len(notes)}\n{note}" for i, note in enumerate(notes, 1))
+        if len(notes) == 1 or token_utils.count_tokens(merged, model) <= token_budget:
+            return merged
+        pieces = [{'filename': f"부분 {i}", 'status': "정리본", 'patch': note}
+                  for i, note in enumerate(notes, 1)]
+        chunks = token_utils.chunk_changes(pieces, token_budget, model)
+    return merged
+
+
+def build_summary_prompt(changes, model, temperature=0, token_budget=CHUNK_TOKEN_BUDGET):
+    """
+    변경 내역으로 최종 요약 요청의 user 메시지를 만듭니다. (큰 커밋은 청크 요약까지 포함)
+    """
+    return make_prompt(_map_reduce_input(changes, model, temperature, token_budget))
+
+
+def summarize_changes(changes, repo, commit_sha, model, system_prompt, temperature=0,
+                      token_budget=CHUNK_TOKEN_BUDGET):
+    """
+    커밋 변경 내역을 요약합니다. 같은 (repo, 커밋, 모델, temperature, 프롬프트) 조합은
+    캐시에서 바로 돌려주고, 처음 보는 조합만 LLM을 호출합니다.
+    변경 내역이 token_budget을 넘으면 청크 단위로 나눠 병렬 요약한 뒤 make_prompt 형식으로 합칩니다.
+    """
+    cache = summary_cache.get_cache()
+    key = summary_cache.make_key(repo, commit_sha, model, temperature, prompt_hash(system_prompt))
+    cached = cache.get(key)
+    metrics.record("summary_cache", hit=int(cached is not None))
+    if cached is not None:
+        return cached
+
+    # 큰 커밋은 청크 요약(llm_map)까지 포함한 시간
+    with metrics.stage("prompt_build") as m:
+        prompt = build_summary_prompt(changes, model, temperature, token_budget)
+        m["prompt_chars"] = len(prompt)
+    summary = _chat(model, temperature, system_prompt, prompt)
+    cache.put(key, summary)
+    return summary
+
+
+def _stream_chat(model, temperature, system_prompt, prompt):
+    """
+    LLM 응답을 토큰이 도착하는 대로 조각(str)으로 yield 합니다. (llm_call 단계로 기록)
     """
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/commits/{commit_hash}"
+    with metrics.stage("llm_call", model=model, stream=1) as m:
+        preflight(m, model, system_prompt, prompt)
+        start = time.perf_counter()
+        stream = get_client().chat.completions.create(
+            model=model,
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ]
+        )
+        first = True
+        for chunk in stream:
+            # 마지막 청크에는 choices 없이 usage만 들어 있음
+            _record_usage(m, getattr(chunk, "usage", None))
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if first:
+                    m["first_token_seconds"] = round(time.perf_counter() - start, 6)
+                    first = False
+                yield delta
+
+
+def _cached_stream(cache, key, model, temperature, system_prompt, prompt):
+    # 스트림이 끝까지 완료된 경우에만 캐시에 저장
+    parts = []
+    for delta in _stream_chat(model, temperature, system_prompt, prompt):
+        parts.append(delta)
+        yield delta
+    cache.put(key, "".join(parts))
+
+
+def stream_summary(changes, repo, commit_sha, model, system_prompt, temperature=0,
+                   token_budget=CHUNK_TOKEN_BUDGET):
+    """
+    summarize_changes와 같지만, 최종 요약을 토큰이 도착하는 대로 조각(str)으로 yield 합니다.
+    캐시에 있으면 전체 요약을 한 번에 yield 하고, 스트림이 끝까지 완료된 경우에만 캐시에 저장합니다.
+    """
+    cache = summary_cache.get_cache()
+    key = summary_cache.make_key(repo, commit_sha, model, temperature, prompt_hash(system_prompt))
+    cached = cache.get(key)
+    metrics.record("summary_cache", hit=int(cached is not None))
+    if cached is not None:
+        yield cached
+        return
+
+    # 큰 커밋은 청크 요약(llm_map)까지 포함한 시간
+    with metrics.stage("prompt_build") as m:
+        prompt = build_summary_prompt(changes, model, temperature, token_budget)
+        m["prompt_chars"] = len(prompt)
+    yield from _cached_stream(cache, key, model, temperature, system_prompt, prompt)
+
+
+# 🌐 GitHub API 공용 세션 (keep-alive 커넥션 풀)
+# GitHub Enterprise나 benchmarks/의 로컬 테스트 서버를 쓸 때는 GITHUB_API_URL로 바꿀 수 있음
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+MAX_FETCH_WORKERS = 8  # 동시에 GitHub에 보내는 요청 수 상한
+
+_github_session = None
+_github_session_lock = threading.Lock()
+
+
+def get_github_session():
+    """
+    프로세스 전체에서 공유하는 requests.Session을 반환합니다.
+    커넥션 풀을 재사용하므로 커밋마다 TLS 핸드셰이크를 다시 하지 않습니다.
+    """
+    global _github_session
+    with _github_session_lock:
+        if _github_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_FETCH_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _github_session = session
+        return _github_session
+
+
+def github_headers(github_token=None):
     headers = {"Accept": "application/vnd.github.v3+json"}
     if github_token:
         headers["Authorization"] = f"token {github_token}"
+    return headers
+
+
+# 📂 특정 시점(ref)의 파일 원본 가져오기
+def get_file_content(owner, repo, path, ref, github_token=None):
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/contents/{path}"
+    headers = github_headers(github_token)
+    headers["Accept"] = "application/vnd.github.raw"
+    with metrics.stage("github_file") as m:
+        response = get_github_session().get(api_url, headers=headers, params={"ref": ref})
+        response.raise_for_status()
+        m["bytes"] = len(response.content)
+    return response.text
+
 
+# 📓 노트북 파일은 JSON patch 대신 셀 소스 diff로 바꾸기
+def notebook_patch(owner, repo, file_info, commit_data, github_token=None):
+    """
+    커밋 전/후 노트북을 받아 출력이 제거된 셀 단위 diff를 만듭니다.
+    가져오거나 파싱하지 못하면 None을 반환합니다. (호출하는 쪽에서 원래 patch 사용)
+    """
+    parents = commit_data.get('parents') or []
     try:
-        response = requests.get(api_url, headers=headers)
+        before = ""
+        if file_info['status'] != 'added' and parents:
+            before_path = file_info.get('previous_filename', file_info['filename'])
+            before = get_file_content(owner, repo, before_path, parents[0]['sha'], github_token)
+        after = ""
+        if file_info['status'] != 'removed':
+            after = get_file_content(owner, repo, file_info['filename'], commit_data['sha'], github_token)
+        return notebook_diff.diff_notebooks(before, after)
+    except Exception as e:
+        print(f"⚠️ 노트북 셀 비교 실패 ({file_info['filename']}): {type(e).__name__}: {e}")
+        return None
+
+
+# 📂 raw diff를 스트리밍으로 읽어 파일별 patch로 나누기
+def _diff_path(header):
+    # "+++ b/경로" / "--- a/경로" 줄에서 경로만 꺼냄 (특수 문자가 있는 경로는 따옴표로 감싸져 있음)
+    path = header[4:].strip()
+    if path.startswith('"') and path.endswith('"'):
+        path = path[1:-1].encode("latin-1", "backslashreplace").decode("unicode_escape").encode("latin-1").decode("utf-8")
+    return None if path == "/dev/null" else path[2:]
+
+
+def _iter_lines(chunks):
+    """
+    바이트 조각 스트림을 줄 단위로 나눕니다. 조각 끝에 걸친 줄은 다음 조각과 이어 붙입니다.
+    (requests의 iter_lines(delimiter=...)는 조각이 줄바꿈으로 끝나면 빈 줄을 하나 더 만듦)
+    """
+    pending = b""
+    for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def iter_raw_diff(owner, repo, commit_hash, github_token=None):
+    """
+    커밋의 전체 diff(application/vnd.github.diff)를 스트리밍으로 읽으며
+    파일 하나가 끝날 때마다 {'filename', 'patch'}를 yield 합니다.
+    전체 diff를 하나의 문자열로 메모리에 올리지 않습니다.
+    """
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/{commit_hash}"
+    headers = github_headers(github_token)
+    headers["Accept"] = "application/vnd.github.diff"
+
+    with metrics.stage("github_raw_diff") as m, \
+            get_github_session().get(api_url, headers=headers, stream=True) as response:
         response.raise_for_status()
-        commit_data = response.json()
+        old_path = new_path = None
+        hunk_lines = None
+        m["bytes"] = 0
 
-        if 'files' not in commit_data:
-            return []
+        def chunks():
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                m["bytes"] += len(chunk)
+                yield chunk
 
-        changes = []
-        for file_info in commit_data['files']:
-            if 'patch' not in file_info:
-                continue
-            change_detail = {
-                'filename': file_info['filename'],
-                'status': file_info['status'],
-                'patch': file_info['patch']
-            }
-            changes.append(change_detail)
+        for raw in _iter_lines(chunks()):
+            line = raw.decode("utf-8", errors="replace")
+            if line.startswith("diff --git "):
+                if hunk_lines:
+                    yield {'filename': new_path or old_path, 'patch': "\n".join(hunk_lines)}
+                old_path = new_path = None
+                hunk_lines = None
+            elif hunk_lines is None and line.startswith("--- "):
+                old_path = _diff_path(line)
+            elif hunk_lines is None and line.startswith("+++ "):
+                new_path = _diff_path(line)
+            elif line.startswith("@@"):
+                if hunk_lines is None:
+                    hunk_lines = []
+                hunk_lines.append(line)
+            elif hunk_lines is not None:
+                hunk_lines.append(line)
+        if hunk_lines:
+            yield {'filename': new_path or old_path, 'patch': "\n".join(hunk_lines)}
+
+
+# 📂 GitHub 커밋 변경 내역 가져오기
+def get_commit_changes(owner, repo, commit_hash, github_token=None):
+    """
+    특정 커밋에서 변경된 모든 파일의 diff 내용을 가져옵니다.
+    - 파일이 많은 커밋은 페이지(최대 100개씩)를 모두 따라가며 가져옵니다.
+    - 너무 커서 API가 patch를 생략한 파일은 raw diff 스트림에서 채워 넣습니다.
+    - .ipynb 파일은 출력을 뺀 셀 소스 diff로 바꿔서 담습니다.
+    """
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/{commit_hash}"
+    headers = github_headers(github_token)
+
+    try:
+        with metrics.stage("github_fetch") as m:
+            commit_data, files = None, []
+            m["bytes"] = 0
+            url, params = api_url, {"per_page": 100}
+            while url:
+                response = get_github_session().get(url, headers=headers, params=params)
+                response.raise_for_status()
+                m["bytes"] += len(response.content)
+                page = response.json()
+                if commit_data is None:
+                    commit_data = page
+                files.extend(page.get('files', []))
+                # 다음 페이지 URL에는 쿼리가 이미 포함되어 있음
+                url, params = response.links.get("next", {}).get("url"), None
+
+            # patch가 생략된 텍스트 파일 (바이너리 파일은 changes가 0)
+            missing = {f['filename'] for f in files
+                       if 'patch' not in f and f.get('changes') and not f['filename'].endswith(".ipynb")}
+            raw_patches = {}
+            if missing:
+                # 아주 큰 커밋은 GitHub가 diff 형식 요청을 거절하기도 함(406 등)
+                # → 이미 받은 파일 목록은 버리지 않고, patch가 있는 파일만으로 계속 진행
+                try:
+                    for item in iter_raw_diff(owner, repo, commit_hash, github_token):
+                        if item['filename'] in missing:
+                            raw_patches[item['filename']] = item['patch']
+                except requests.exceptions.RequestException as e:
+                    print(f"⚠️ raw diff를 가져오지 못해 patch가 생략된 파일 {len(missing) - len(raw_patches)}개를 "
+                          f"제외합니다: {e}")
+                    m["raw_diff_error"] = type(e).__name__
+
+            changes = []
+            for file_info in files:
+                patch = file_info.get('patch') or raw_patches.get(file_info['filename'])
+                # 출력이 큰 노트북은 patch가 아예 없는 경우가 많아서, patch 유무와 상관없이 셀 비교를 시도
+                # (출력만 바뀐 노트북은 빈 diff가 되어 제외됨)
+                if file_info['filename'].endswith(".ipynb"):
+                    cell_patch = notebook_patch(owner, repo, file_info, commit_data, github_token)
+                    if cell_patch is not None:
+                        patch = cell_patch
+                if not patch:
+                    continue
+                change_detail = {
+                    'filename': file_info['filename'],
+                    'status': file_info['status'],
+                    'patch': patch
+                }
+                changes.append(change_detail)
+            m["files"] = len(changes)
         return changes
 
     except requests.exceptions.RequestException as e:
         print(f"❌ GitHub에서 커밋 정보를 가져오는 데 실패했습니다: {e}")
-        if 'response' in locals():
-            print(f"error contents: {response.text}")
+        # 실패한 요청의 응답 (성공한 이전 페이지의 응답이 아님)
+        if getattr(e, "response", None) is not None:
+            print(f"error contents: {e.response.text}")
         return None
 
 
-# 📂 LLM 인포그래픽 생성 함수
-def code_to_card_infographic_llm(code_str, output_file, title="학습 인포그래픽"):
-    example_card = """
+# 🌐 ETag 조건부 요청
+def github_get(url, github_token=None, params=None, etag_store=None):
+    """
+    GitHub API GET 요청 후 (JSON 본문, 다음 페이지 URL)을 반환합니다.
+    etag_store가 있으면 If-None-Match를 보내고, 304 응답이면 저장해 둔 본문을 그대로 돌려줍니다.
+    (304 응답은 GitHub rate limit에 포함되지 않음)
+    """
+    headers = github_headers(github_token)
+    key = requests.Request("GET", url, params=params).prepare().url
+    cached = etag_store.get_etag(key) if etag_store else None
+    if cached:
+        headers["If-None-Match"] = cached[0]
+
+    with metrics.stage("github_api") as m:
+        response = get_github_session().get(url, headers=headers, params=params)
+        m["bytes"] = len(response.content)
+        m["not_modified"] = int(response.status_code == 304)
+    if response.status_code == 304 and cached:
+        body = json.loads(cached[1])
+        return body["data"], body["next"]
+    response.raise_for_status()
+
+    data = response.json()
+    next_url = response.links.get("next", {}).get("url")
+    if etag_store and response.headers.get("ETag"):
+        etag_store.put_etag(key, response.headers["ETag"], json.dumps({"data": data, "next": next_url}))
+    return data, next_url
+
+
+# 📂 기간/범위에 해당하는 커밋 목록 가져오기
+def list_commits(owner, repo, github_token=None, base=None, head=None,
+                 since=None, until=None, branch=None, etag_store=None):
+    """
+    커밋 해시 목록을 오래된 순서로 반환합니다.
+    - base와 head가 주어지면 compare API(`base...head`)를 사용합니다.
+    - 그렇지 않으면 since/until(ISO 8601)과 branch로 커밋 목록을 조회합니다.
+    - etag_store를 넘기면 조건부 요청을 사용합니다.
+    """
+    try:
+        if base and head:
+            api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/compare/{base}...{head}"
+            shas, page = [], 1
+            while True:
+                data, _ = github_get(api_url, github_token, params={"per_page": 100, "page": page},
+                                     etag_store=etag_store)
+                commits = data.get("commits", [])
+                shas.extend(c["sha"] for c in commits)
+                if len(commits) < 100:
+                    return shas
+                page += 1
+
+        params = {"per_page": 100}
+        if since:
+            params["since"] = since
+        if until:
+            params["until"] = until
+        if branch:
+            params["sha"] = branch
+
+        api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits"
+        shas = []
+        while api_url:
+            data, next_url = github_get(api_url, github_token, params=params, etag_store=etag_store)
+            shas.extend(c["sha"] for c in data)
+            # 다음 페이지 URL에는 쿼리가 이미 포함되어 있음
+            api_url, params = next_url, None
+        # commits API는 최신순이므로 뒤집어서 시간순으로 맞춤
+        return shas[::-1]
+
+    except requests.exceptions.RequestException as e:
+        print(f"❌ GitHub에서 커밋 목록을 가져오는 데 실패했습니다: {e}")
+        return None
+
+
+# 📂 브랜치의 최신 커밋 SHA
+def get_branch_head(owner, repo, branch, github_token=None, etag_store=None):
+    try:
+        data, _ = github_get(f"{GITHUB_API_URL}/repos/{owner}/{repo}/branches/{branch}", github_token,
+                             etag_store=etag_store)
+        return data["commit"]["sha"]
+    except requests.exceptions.RequestException as e:
+        print(f"❌ GitHub에서 브랜치 정보를 가져오는 데 실패했습니다: {e}")
+        return None
+
+
+# 🔖 브랜치/태그/짧은 해시를 전체 커밋 SHA로 바꾸기
+def resolve_commit_sha(owner, repo, ref, github_token=None):
+    """
+    커밋을 가리키는 아무 ref(브랜치, 태그, 짧은 해시)를 40자리 커밋 SHA로 바꿉니다.
+    main 같은 ref는 가리키는 커밋이 계속 바뀌므로 캐시 키에는 이 SHA를 써야 합니다.
+    이미 전체 SHA면 요청 없이 그대로 돌려주고, 실패하면 None을 반환합니다.
+    """
+    ref = ref.strip()
+    if len(ref) == 40 and all(ch in "0123456789abcdef" for ch in ref.lower()):
+        return ref.lower()
+    # sha 미디어 타입은 커밋 JSON 대신 SHA 문자열만 돌려줌
+    headers = {**github_headers(github_token), "Accept": "application/vnd.github.sha"}
+    try:
+        response = get_github_session().get(f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/{ref}", headers=headers)
+        response.raise_for_status()
+        return response.text.strip()
+    except requests.exceptions.RequestException as e:
+        print(f"❌ GitHub에서 '{ref}'가 가리키는 커밋을 찾지 못했습니다: {e}")
+        return None
+
+
+# 📂 여러 커밋의 변경 내역을 동시에 가져오기
+def get_commits_changes(owner, repo, commit_hashes, github_token=None,
+                        max_workers=MAX_FETCH_WORKERS):
+    """
+    여러 커밋의 diff를 공용 커넥션 풀 위에서 최대 max_workers개씩 동시에 가져옵니다.
+    반환값은 {커밋 해시: 변경 내역 리스트(또는 실패 시 None)} 이며 입력 순서를 유지합니다.
+    """
+    if not commit_hashes:
+        return {}
+
+    def fetch(sha):
+        return get_commit_changes(owner, repo, sha, github_token=github_token)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(commit_hashes)))) as pool:
+        results = list(pool.map(metrics.bind(fetch), commit_hashes))
+    return dict(zip(commit_hashes, results))
+
+
+# 📂 기간/범위 백필: 커밋 목록 조회 + 동시 diff 가져오기
+def get_range_changes(owner, repo, github_token=None, base=None, head=None,
+                      since=None, until=None, branch=None,
+                      max_workers=MAX_FETCH_WORKERS):
+    """
+    범위에 속한 모든 커밋의 변경 내역을 하나의 리스트로 합쳐 반환합니다.
+    각 항목에는 어느 커밋에서 나왔는지 알 수 있도록 'commit' 키가 추가됩니다.
+    """
+    shas = list_commits(owner, repo, github_token=github_token, base=base, head=head,
+                        since=since, until=until, branch=branch)
+    if shas is None:
+        return None
+
+    changes = []
+    for sha, commit_changes in get_commits_changes(
+            owner, repo, shas, github_token=github_token, max_workers=max_workers).items():
+        for c in commit_changes or []:
+            changes.append({**c, 'commit': sha})
+    return changes
+
+
+# 📝 변경 내역을 프롬프트용 텍스트로 합치기
+def _format_change(c, patch):
+    return ((f"🔖 커밋: {c['commit'][:7]}\n" if c.get('commit') else "")
+            + f"📄 파일명: {c['filename']} ({c['status']})\n{patch}")
+
+
+def format_changes(changes):
+    return "\n\n".join(_format_change(c, c['patch']) for c in changes)
+
+
+# 📊 카드형 인포그래픽 (HTML)
+INFOGRAPHIC_MODEL = "gpt-4o-mini"
+INFOGRAPHIC_SYSTEM_PROMPT = "너는 HTML 인포그래픽 디자이너다."
+INFOGRAPHIC_TITLE = "GitHub Commit 변경 인포그래픽"
+
+_EXAMPLE_CARD = """
     <div class="card data">
       <div class="icon">📂</div>
       <div class="title">[단계명]</div>
@@ -146,7 +704,10 @@ def code_to_card_infographic_llm(code_str, output_file, title="학습 인포그
     </div>
     """
 
-    prompt = f"""
+
+def make_infographic_prompt(code_str, title="학습 인포그래픽"):
+    # 요약 프롬프트와 마찬가지로 고정 지시문을 앞에, 제목과 입력을 맨 뒤에 둠
+    return f"""
     아래는 학습 코드 또는 커밋 변경 내역입니다. 이를 분석해서 학습 과정의 주요 단계를 뽑아 인포그래픽을 만들어주세요.
 
     조건:
@@ -156,25 +717,47 @@ def code_to_card_infographic_llm(code_str, output_file, title="학습 인포그
     - 키워드 태그는 실제 등장한 함수명/클래스명/메서드명 또는 주요 변경 포인트를 넣으세요.
     - 여러 카드를 grid 레이아웃 안에 넣어주세요.
     - 전체 HTML 문서 형태로 출력하세요 (<html> ~ </html> 포함).
-    - 제목은 "{title}" 로 작성하세요.
+    - 제목은 입력 바로 앞의 "제목:" 줄에 적힌 문구로 작성하세요.
 
     --- 카드 예시 ---
-    {example_card}
+    {_EXAMPLE_CARD}
+    제목: {title}
     --- 입력 시작 ---
     {code_str}
     --- 입력 끝 ---
     """
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        temperature=0,
-        messages=[
-            {"role": "system", "content": "너는 HTML 인포그래픽 디자이너다."},
-            {"role": "user", "content": prompt}
-        ]
-    )
 
-    html_content = response.choices[0].message.content
+def _strip_fence(html):
+    # 모델이 ```html ... ``` 로 감싸서 돌려주는 경우 코드 펜스를 벗겨냄
+    text = html.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def infographic_key(repo, commit_sha, title):
+    """
+    인포그래픽은 요약과 같은 캐시에 (repo, 커밋) 기준으로 나란히 저장합니다.
+    """
+    raw = INFOGRAPHIC_SYSTEM_PROMPT + "\x00" + make_infographic_prompt("", title)
+    return summary_cache.make_key(repo, commit_sha, INFOGRAPHIC_MODEL, 0,
+                                  hashlib.sha256(raw.encode("utf-8")).hexdigest())
+
+
+def make_infographic(code_str, title="학습 인포그래픽"):
+    """
+    변경 내역 텍스트로 카드형 인포그래픽 HTML 문서를 만들어 반환합니다.
+    """
+    html = _chat(INFOGRAPHIC_MODEL, 0, INFOGRAPHIC_SYSTEM_PROMPT,
+                 make_infographic_prompt(code_str, title), stage="llm_infographic")
+    return _strip_fence(html)
+
+
+def code_to_card_infographic_llm(code_str, output_file, title="학습 인포그래픽"):
+    html_content = make_infographic(code_str, title)
 
     with open(output_file, "w", encoding="utf-8") as f:
         f.write(html_content)
@@ -183,6 +766,71 @@ def code_to_card_infographic_llm(code_str, output_file, title="학습 인포그
     return html_content
 
 
+# 🔀 요약 + 인포그래픽 동시 생성
+# 두 LLM 호출이 같은 입력(changes_text)을 쓰므로, 입력은 한 번만 만들고 두 요청을 동시에 보냄
+# → 커밋 하나에 결과물 두 개를 만드는 시간이 LLM 왕복 두 번이 아니라 한 번(둘 중 긴 쪽)이 됨
+_artifact_pool = ThreadPoolExecutor(max_workers=MAX_LLM_WORKERS)
+
+
+def stream_summary_with_infographic(changes, repo, commit_sha, model, system_prompt, temperature=0,
+                                    title=INFOGRAPHIC_TITLE, token_budget=CHUNK_TOKEN_BUDGET):
+    """
+    (요약 조각을 yield 하는 제너레이터, 인포그래픽 HTML Future)를 반환합니다.
+    인포그래픽 요청은 반환 전에 이미 시작되어 있고, 요약 스트림을 읽는 동안 함께 진행됩니다.
+    둘 다 요약 캐시에 (repo, 커밋) 기준으로 저장되며, 캐시에 있는 쪽은 LLM을 호출하지 않습니다.
+    """
+    cache = summary_cache.get_cache()
+    summary_key = summary_cache.make_key(repo, commit_sha, model, temperature, prompt_hash(system_prompt))
+    html_key = infographic_key(repo, commit_sha, title)
+    summary = cache.get(summary_key)
+    html = cache.get(html_key)
+    metrics.record("summary_cache", hit=int(summary is not None))
+    metrics.record("infographic_cache", hit=int(html is not None))
+
+    changes_text = None
+    if summary is None or html is None:
+        # 큰 커밋은 청크 요약(llm_map)까지 포함한 시간
+        with metrics.stage("prompt_build") as m:
+            changes_text = _map_reduce_input(changes, model, temperature, token_budget)
+            m["prompt_chars"] = len(changes_text)
+
+    def build_infographic():
+        result = make_infographic(changes_text, title)
+        cache.put(html_key, result)
+        return result
+
+    if html is None:
+        html_future = _artifact_pool.submit(metrics.bind(build_infographic))
+    else:
+        html_future = Future()
+        html_future.set_result(html)
+
+    if summary is not None:
+        return iter([summary]), html_future
+    return _cached_stream(cache, summary_key, model, temperature, system_prompt,
+                          make_prompt(changes_text)), html_future
+
+
+def summarize_with_infographic(changes, repo, commit_sha, model, system_prompt, temperature=0,
+                               title=INFOGRAPHIC_TITLE, token_budget=CHUNK_TOKEN_BUDGET):
+    """
+    요약과 인포그래픽을 동시에 만들어 (요약, HTML)을 반환합니다.
+    """
+    stream, html_future = stream_summary_with_infographic(
+        changes, repo, commit_sha, model, system_prompt, temperature, title, token_budget
+    )
+    summary = "".join(stream)
+    return summary, html_future.result()
+
+
+def infographic_markdown(html):
+    """
+    Notion에 함께 올릴 수 있도록 인포그래픽 HTML을 코드 블록 구역(마크다운)으로 감쌉니다.
+    (Notion API로는 파일을 바로 올릴 수 없어, HTML 원문을 code 블록에 담아 둠)
+    """
+    return f"### 📊 변경 인포그래픽\n\n```html\n{html}\n```\n"
+
+
 # 🚀 MAIN
 if __name__ == "__main__":
     # --- 사용자 입력 ---
@@ -191,44 +839,46 @@ if __name__ == "__main__":
     TARGET_COMMIT_HASH = "25fa85e78123d7b173ee50b69f8b452977100c75"
     GITHUB_API_TOKEN = os.getenv("GITHUB_TOKEN")
 
-    # 커밋 diff 가져오기
-    commit_changes = get_commit_changes(
-        owner=REPO_OWNER,
-        repo=REPO_NAME,
-        commit_hash=TARGET_COMMIT_HASH,
-        github_token=GITHUB_API_TOKEN
-    )
-
-    if commit_changes:
-        print(f"\n✅ 총 {len(commit_changes)}개의 파일에서 변경 내역 발견!\n")
-        changes_text = "\n\n".join(
-            f"📄 파일명: {c['filename']} ({c['status']})\n{c['patch']}"
-            for c in commit_changes
+    with metrics.start_run("cli", repo=f"{REPO_OWNER}/{REPO_NAME}") as run:
+        # 커밋 diff 가져오기
+        commit_changes = get_commit_changes(
+            owner=REPO_OWNER,
+            repo=REPO_NAME,
+            commit_hash=TARGET_COMMIT_HASH,
+            github_token=GITHUB_API_TOKEN
         )
 
-        # 📒 학습 요약 생성
-        prompt = make_prompt(changes_text)
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0,
-            messages=[
-                {"role": "system", "content": "너는 학습 요약 도우미다. 변경된 코드만 분석해라."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        summary = response.choices[0].message.content
+        if commit_changes:
+            print(f"\n✅ 총 {len(commit_changes)}개의 파일에서 변경 내역 발견!\n")
+            commit_changes, filter_report = diff_filter.filter_changes(commit_changes)
+            print(f"🧹 {diff_filter.format_report(filter_report)}")
 
-        today = datetime.date.today().strftime("%Y-%m-%d")
-        summary_file = f"commit_summary_{today}.md"
-        with open(summary_file, "w", encoding="utf-8") as f:
-            f.write(summary)
-        pyperclip.copy(summary)
-        print(f"✅ 학습 요약 저장 완료: {summary_file}")
-        print("📋 클립보드에도 복사됨")
+            # 📒 학습 요약 + 📊 인포그래픽을 동시에 생성
+            summary, html_content = summarize_with_infographic(
+                commit_changes,
+                repo=f"{REPO_OWNER}/{REPO_NAME}",
+                commit_sha=TARGET_COMMIT_HASH,
+                model="gpt-4o-mini",
+                system_prompt=SUMMARY_SYSTEM_PROMPT  # 웹 UI·웹훅과 같은 시스템 메시지 → 같은 prefix 캐시를 씀
+            )
 
-        # 📊 인포그래픽 HTML 생성
-        html_file = f"commit_infographic_{today}.html"
-        code_to_card_infographic_llm(changes_text, html_file, title="GitHub Commit 변경 인포그래픽")
+            today = datetime.date.today().strftime("%Y-%m-%d")
+            summary_file = f"commit_summary_{today}.md"
+            with open(summary_file, "w", encoding="utf-8") as f:
+                f.write(summary)
+            import pyperclip
+            pyperclip.copy(summary)
+            print(f"✅ 학습 요약 저장 완료: {summary_file}")
+            print("📋 클립보드에도 복사됨")
 
-    else:
-        print("❌ 변경 내역을 가져오지 못했습니다.")
+            html_file = f"commit_infographic_{today}.html"
+            with open(html_file, "w", encoding="utf-8") as f:
+                f.write(html_content)
+            print(f"✅ 카드형 인포그래픽 HTML 생성 완료: {html_file}")
+
+        else:
+            print("❌ 변경 내역을 가져오지 못했습니다.")
+
+    # ⏱️ 단계별 소요 시간
+    for row in run.summary():
+        print(f"⏱️ {row['stage']:<16} {row['count']:>3}회 {row['seconds']:8.2f}s")
@@ -0,0 +1,168 @@
+# 파일명: metrics.py
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+
+# ⏱️ 파이프라인 단계별 소요 시간·토큰·재시도·전송량 기록
+# - with metrics.start_run("app"): 으로 한 번의 실행(run)을 묶고
+# - with metrics.stage("llm_call") as m: m["prompt_tokens"] = ... 처럼 단계를 기록합니다.
+# - METRICS_PATH 환경 변수가 있으면 run이 끝날 때 이벤트를 JSON lines로 추가 저장합니다.
+# - render_prometheus()는 프로세스 누적값을 Prometheus 텍스트 형식으로 돌려줍니다. (webhook_server의 /metrics)
+
+METRICS_PATH = os.getenv("METRICS_PATH")
+
+_current_run = contextvars.ContextVar("metrics_run", default=None)
+_totals_lock = threading.Lock()
+_stage_totals = {}    # stage -> {"count": n, "seconds": s}
+_counter_totals = {}  # (stage, field) -> 합계
+
+
+class Run:
+    def __init__(self, name, **labels):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.labels = labels
+        self.started = time.time()
+        self.events = []
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds=None, **fields):
+        event = {"run": self.id, "name": self.name, "stage": stage, "ts": time.time(), **self.labels, **fields}
+        if seconds is not None:
+            event["seconds"] = round(seconds, 6)
+        with self.lock:
+            self.events.append(event)
+
+    def summary(self):
+        """
+        단계별로 횟수, 총 소요 시간, 숫자 필드 합계를 모은 리스트를 반환합니다. (먼저 시작한 단계 순)
+        """
+        rows = {}
+        with self.lock:
+            events = list(self.events)
+        for event in events:
+            row = rows.setdefault(event["stage"], {"stage": event["stage"], "count": 0, "seconds": 0.0})
+            row["count"] += 1
+            for key, value in event.items():
+                if key in ("ts", "stage", "run", "name") or key in self.labels:
+                    continue
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    row[key] = round(row.get(key, 0) + value, 6)
+        return list(rows.values())
+
+
+def current_run():
+    return _current_run.get()
+
+
+def _add_totals(stage, seconds, fields):
+    with _totals_lock:
+        totals = _stage_totals.setdefault(stage, {"count": 0, "seconds": 0.0})
+        totals["count"] += 1
+        totals["seconds"] += seconds or 0.0
+        for key, value in fields.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                _counter_totals[(stage, key)] = _counter_totals.get((stage, key), 0) + value
+
+
+def record(stage, seconds=None, **fields):
+    """
+    현재 run에 이벤트를 하나 남깁니다. run이 없어도 프로세스 누적값에는 반영됩니다.
+    """
+    _add_totals(stage, seconds, fields)
+    run = _current_run.get()
+    if run is not None:
+        run.record(stage, seconds, **fields)
+
+
+@contextlib.contextmanager
+def stage(name, **fields):
+    """
+    블록 실행 시간을 재서 기록합니다. yield 된 dict에 토큰 수, 바이트 수 등을 채워 넣으면 함께 기록됩니다.
+    """
+    extra = dict(fields)
+    start = time.perf_counter()
+    try:
+        yield extra
+    except BaseException as e:
+        extra["error"] = type(e).__name__
+        raise
+    finally:
+        record(name, time.perf_counter() - start, **extra)
+
+
+@contextlib.contextmanager
+def start_run(name, **labels):
+    run = Run(name, **labels)
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+        if METRICS_PATH:
+            _export_jsonl(run)
+
+
+def bind(fn):
+    """
+    스레드 풀에서 실행될 함수가 호출한 쪽의 run에 기록되도록 감쌉니다.
+    (contextvars는 ThreadPoolExecutor 작업으로 자동 전달되지 않음)
+    """
+    run = _current_run.get()
+
+    def wrapper(*args, **kwargs):
+        token = _current_run.set(run)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_run.reset(token)
+    return wrapper
+
+
+def _export_jsonl(run):
+    if os.path.dirname(METRICS_PATH):
+        os.makedirs(os.path.dirname(METRICS_PATH), exist_ok=True)
+    with run.lock:
+        lines = [json.dumps(event, ensure_ascii=False) for event in run.events]
+    with _totals_lock, open(METRICS_PATH, "a", encoding="utf-8") as f:
+        for line in lines:
+            f.write(line + "\n")
+
+
+def snapshot():
+    """
+    프로세스 누적값을 {stage: {"count", "seconds", 숫자 필드...}} 형태로 복사해 반환합니다.
+    (전/후 snapshot의 차이로 구간별 집계를 낼 때 사용)
+    """
+    with _totals_lock:
+        result = {s: dict(v) for s, v in _stage_totals.items()}
+        for (s, key), value in _counter_totals.items():
+            result.setdefault(s, {"count": 0, "seconds": 0.0})[key] = value
+    return result
+
+
+def render_prometheus():
+    with _totals_lock:
+        stages = {k: dict(v) for k, v in _stage_totals.items()}
+        counters = dict(_counter_totals)
+    lines = [
+        "# HELP code_diary_stage_seconds_total Total wall time spent in each pipeline stage.",
+        "# TYPE code_diary_stage_seconds_total counter",
+    ]
+    lines += [f'code_diary_stage_seconds_total{{stage="{s}"}} {v["seconds"]:.6f}' for s, v in sorted(stages.items())]
+    lines += [
+        "# HELP code_diary_stage_calls_total Number of times each pipeline stage ran.",
+        "# TYPE code_diary_stage_calls_total counter",
+    ]
+    lines += [f'code_diary_stage_calls_total{{stage="{s}"}} {v["count"]}' for s, v in sorted(stages.items())]
+    lines += [
+        "# HELP code_diary_stage_value_total Sum of numeric fields (tokens, bytes, retries) per stage.",
+        "# TYPE code_diary_stage_value_total counter",
+    ]
+    lines += [f'code_diary_stage_value_total{{stage="{s}",field="{k}"}} {v}' for (s, k), v in sorted(counters.items())]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,105 @@
+# 파일명: notebook_diff.py
+
+import difflib
+import itertools
+
+# 📓 .ipynb 변경 내역을 셀 단위로 비교
+# GitHub가 주는 노트북 patch는 실행 번호, 출력, base64 이미지 등이 섞인 JSON diff라서
+# LLM에게 의미 없는 토큰이 대부분입니다. 출력은 버리고 셀 소스만 비교합니다.
+
+CELL_MATCH_RATIO = 0.5  # 셀 개수가 달라진 구간에서 이 이상 비슷한 셀은 같은 셀을 고친 것으로 봄
+
+
+def notebook_cells(text):
+    """
+    노트북 JSON 문자열에서 (셀 종류, 소스) 리스트를 꺼냅니다. 출력(outputs)과 실행 번호는 무시합니다.
+    """
+    if not text:
+        return []
+    # nbformat은 노트북이 포함된 커밋에서만 필요하므로 여기서 import
+    import nbformat
+
+    nb = nbformat.reads(text, as_version=4)
+    return [(cell.cell_type, cell.source) for cell in nb.cells if cell.cell_type in ("code", "markdown")]
+
+
+def _cell_lines(source, prefix):
+    return [f"{prefix}{line}" for line in source.splitlines()] or [prefix]
+
+
+def _modified_cell_lines(number, old_cell, new_cell):
+    (old_type, old_src), (new_type, new_src) = old_cell, new_cell
+    out = [f"@@ 셀 {number} ({new_type}) 수정 @@"]
+    if old_type != new_type:
+        out.append(f"# 셀 종류 변경: {old_type} → {new_type}")
+    # 앞의 두 줄(---/+++ 파일 헤더)만 건너뛰고 hunk 헤더(@@)는 따로 거름
+    # ("-- 주석"을 지운 줄은 "---"로 시작하므로 접두사로 거르면 내용이 사라짐)
+    diff_lines = itertools.islice(
+        difflib.unified_diff(old_src.splitlines(), new_src.splitlines(), lineterm="", n=2), 2, None
+    )
+    out.extend(line for line in diff_lines if not line.startswith("@@"))
+    return out
+
+
+def _cell_ratio(old_src, new_src):
+    matcher = difflib.SequenceMatcher(a=old_src.splitlines(), b=new_src.splitlines(), autojunk=False)
+    # 값싼 상한부터 확인해서 긴 셀끼리의 정확한 비교는 필요할 때만 함
+    if matcher.real_quick_ratio() < CELL_MATCH_RATIO or matcher.quick_ratio() < CELL_MATCH_RATIO:
+        return 0.0
+    return matcher.ratio()
+
+
+def _pair_cells(old_cells, new_cells):
+    """
+    개수가 다른 replace 구간의 셀들을 순서를 지키며 비슷한 셀끼리 짝짓습니다.
+    (old 위치 또는 None, new 위치 또는 None) 리스트를 반환하며, 짝이 없는 셀은 삭제/추가로 다룹니다.
+    """
+    pairs, next_new = [], 0
+    for i, (_, old_src) in enumerate(old_cells):
+        best, best_ratio = None, CELL_MATCH_RATIO
+        for k in range(next_new, len(new_cells)):
+            ratio = _cell_ratio(old_src, new_cells[k][1])
+            if ratio >= best_ratio and (best is None or ratio > best_ratio):
+                best, best_ratio = k, ratio
+        if best is None:
+            pairs.append((i, None))
+            continue
+        pairs.extend((None, k) for k in range(next_new, best))
+        pairs.append((i, best))
+        next_new = best + 1
+    pairs.extend((None, k) for k in range(next_new, len(new_cells)))
+    return pairs
+
+
+def diff_notebooks(before_text, after_text):
+    """
+    두 버전의 노트북을 셀 단위로 비교해, 바뀐 셀만 담은 diff 텍스트를 반환합니다.
+    - 수정된 셀: 해당 셀 소스의 unified diff
+      (셀이 추가/삭제된 구간에서도 내용이 비슷한 셀은 수정으로 짝지어 바뀐 줄만 보냄)
+    - 추가/삭제된 셀: 셀 소스 전체에 +/- 표시
+    """
+    before, after = notebook_cells(before_text), notebook_cells(after_text)
+    matcher = difflib.SequenceMatcher(a=before, b=after, autojunk=False)
+
+    out = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if tag == "replace" and i2 - i1 == j2 - j1:
+            pairs = [(offset, offset) for offset in range(i2 - i1)]
+        elif tag == "replace":
+            pairs = _pair_cells(before[i1:i2], after[j1:j2])
+        else:
+            pairs = [(i, None) for i in range(i2 - i1)] + [(None, j) for j in range(j2 - j1)]
+        for old, new in pairs:
+            if old is not None and new is not None:
+                out.extend(_modified_cell_lines(j1 + new + 1, before[i1 + old], after[j1 + new]))
+            elif old is not None:
+                cell_type, source = before[i1 + old]
+                out.append(f"@@ 셀 {i1 + old + 1} ({cell_type}) 삭제 @@")
+                out.extend(_cell_lines(source, "-"))
+            else:
+                cell_type, source = after[j1 + new]
+                out.append(f"@@ 셀 {j1 + new + 1} ({cell_type}) 추가 @@")
+                out.extend(_cell_lines(source, "+"))
+    return "\n".join(out)
@@ -1,120 +1,537 @@
 # 파일명: notion_handler.py
 
+import difflib
+import functools
+import json
+import os
+import re
 import time
+import threading
 from notion_client import Client
+from notion_client.errors import HTTPResponseError
 import httpx
 import streamlit as st
 
-# --- Markdown을 Notion 블록으로 변환하는 함수 (원본 유지) ---
-def md_to_notion_blocks(md: str):
-    # (이전 답변의 md_to_notion_blocks 함수 내용 전체를 여기에 붙여넣으세요.)
-    # ... (생략) ...
-    blocks, lines = [], md.splitlines()
-    code_mode, code_buf, code_lang = False, [], "plain text"
-
-    def flush_code():
-        nonlocal code_buf, code_lang
-        if not code_buf: return
-        code_text = "\n".join(code_buf)[:2000]
-        blocks.append({"object":"block","type":"code",
-                       "code":{"language":code_lang,
-                               "rich_text":[{"type":"text","text":{"content":code_text}}]}})
-        code_buf.clear(); code_lang = "plain text"
+import metrics
+
+# --- Markdown을 Notion 블록으로 변환하는 함수 ---
+MAX_TEXT_LEN = 2000       # rich_text 항목 하나에 넣을 수 있는 최대 글자 수 (Notion 제한)
+MAX_RICH_TEXT_ITEMS = 100 # 블록 하나에 넣을 수 있는 rich_text 항목 수 (Notion 제한)
+
+CODE_LANG_ALIASES = {"py": "python", "js": "javascript", "ts": "typescript", "sh": "shell",
+                     "bash": "bash", "yml": "yaml", "md": "markdown", "text": "plain text", "": "plain text"}
+
+_INLINE_RE = re.compile(
+    r"\*\*(?P<bold>.+?)\*\*"
+    r"|`(?P<code>[^`]+)`"
+    # Notion은 절대 URL만 링크로 받으므로 http(s) 주소만 링크로 만들고 나머지(handlers[0](event), 상대 경로)는 그대로 둠
+    r"|\[(?P<link_text>[^\]]+)\]\((?P<link_url>https?://[^)\s]+)\)"
+    r"|(?<![\w*])\*(?P<italic>[^*\s](?:[^*]*[^*\s])?)\*(?![\w*])"
+)
+_INLINE_MARK_RE = re.compile(r"[*`\[]")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+_TODO_RE = re.compile(r"^[-*+]\s+\[([ xX])\]\s+(.*)$")
+_BULLET_RE = re.compile(r"^[-*+]\s+(.*)$")
+_NUMBERED_RE = re.compile(r"^\d+[.)]\s+(.*)$")
+_DIVIDER_RE = re.compile(r"^(?:-{3,}|\*{3,}|_{3,})$")
+
+
+def _text_items(content, annotations=None, url=None):
+    # 긴 텍스트는 자르지 않고 2000자 단위의 여러 rich_text 항목으로 나눔
+    for i in range(0, len(content), MAX_TEXT_LEN):
+        item = {"type": "text", "text": {"content": content[i:i + MAX_TEXT_LEN]}}
+        if url:
+            item["text"]["link"] = {"url": url}
+        if annotations:
+            item["annotations"] = annotations
+        yield item
+
+
+def rich_text(text):
+    """
+    인라인 마크다운(**굵게**, *기울임*, `코드`, [링크](url))을 Notion rich_text 리스트로 변환합니다.
+    """
+    if not _INLINE_MARK_RE.search(text):
+        return list(_text_items(text))
+    items, pos = [], 0
+    for m in _INLINE_RE.finditer(text):
+        if m.start() > pos:
+            items.extend(_text_items(text[pos:m.start()]))
+        if m.group("bold") is not None:
+            items.extend(_text_items(m.group("bold"), {"bold": True}))
+        elif m.group("code") is not None:
+            items.extend(_text_items(m.group("code"), {"code": True}))
+        elif m.group("link_text") is not None:
+            items.extend(_text_items(m.group("link_text"), url=m.group("link_url")))
+        else:
+            items.extend(_text_items(m.group("italic"), {"italic": True}))
+        pos = m.end()
+    if pos < len(text):
+        items.extend(_text_items(text[pos:]))
+    return items
+
+
+def _blocks(block_type, items, **extra):
+    # rich_text 항목이 100개를 넘으면 같은 종류의 블록 여러 개로 나눔
+    for i in range(0, max(len(items), 1), MAX_RICH_TEXT_ITEMS):
+        yield {"object": "block", "type": block_type,
+               block_type: {"rich_text": items[i:i + MAX_RICH_TEXT_ITEMS], **extra}}
+
+
+def iter_notion_blocks(md):
+    """
+    Markdown을 한 줄씩 읽으며 Notion 블록을 하나씩 yield 하는 제너레이터입니다.
+    md에는 문자열 또는 줄 단위 iterable(스트리밍 출력 등)을 넘길 수 있습니다.
+    """
+    lines = md.splitlines() if isinstance(md, str) else md
+    code_buf, code_lang = None, "plain text"
 
     for raw in lines:
         line = raw.rstrip("\n")
-        if line.strip().startswith("```"):
-            fence = line.strip()[3:].strip()
-            if not code_mode:
-                code_mode, code_lang, code_buf = True, (fence or "plain text"), []
+        stripped = line.strip()
+
+        if stripped.startswith("```"):
+            if code_buf is None:
+                fence = stripped[3:].strip().lower()
+                code_lang, code_buf = CODE_LANG_ALIASES.get(fence, fence), []
             else:
-                code_mode = False; flush_code()
+                if code_buf:
+                    yield from _blocks("code", list(_text_items("\n".join(code_buf))), language=code_lang)
+                code_buf = None
+            continue
+        if code_buf is not None:
+            code_buf.append(line)
+            continue
+        if not stripped:
             continue
-        if code_mode: code_buf.append(line); continue
-        if not line.strip(): continue
-        if line.startswith("### "):
-            blocks.append({"object":"block","type":"heading_3", "heading_3":{"rich_text":[{"type":"text","text":{"content":line[4:]}}]}})
+
+        m = _HEADING_RE.match(line)
+        if m:
+            level = min(len(m.group(1)), 3)
+            yield from _blocks(f"heading_{level}", rich_text(m.group(2)))
+            continue
+        if _DIVIDER_RE.match(stripped):
+            yield {"object": "block", "type": "divider", "divider": {}}
             continue
-        if line.startswith("## "):
-            blocks.append({"object":"block","type":"heading_2", "heading_2":{"rich_text":[{"type":"text","text":{"content":line[3:]}}]}})
+        m = _TODO_RE.match(stripped)
+        if m:
+            yield from _blocks("to_do", rich_text(m.group(2)), checked=m.group(1) != " ")
             continue
-        if line.startswith("# "):
-            blocks.append({"object":"block","type":"heading_1", "heading_1":{"rich_text":[{"type":"text","text":{"content":line[2:]}}]}})
+        m = _BULLET_RE.match(stripped)
+        if m:
+            yield from _blocks("bulleted_list_item", rich_text(m.group(1)))
             continue
-        if line.lstrip().startswith(("- ", "* ")):
-            content = line.lstrip()[2:]
-            blocks.append({"object":"block","type":"bulleted_list_item", "bulleted_list_item":{"rich_text":[{"type":"text","text":{"content":content[:1900]}}]}})
+        m = _NUMBERED_RE.match(stripped)
+        if m:
+            yield from _blocks("numbered_list_item", rich_text(m.group(1)))
             continue
-        blocks.append({"object":"block","type":"paragraph", "paragraph":{"rich_text":[{"type":"text","text":{"content":line[:1900]}}]}})
-    if code_mode: flush_code()
-    return blocks
+        if stripped.startswith(">"):
+            yield from _blocks("quote", rich_text(stripped[1:].lstrip()))
+            continue
+        yield from _blocks("paragraph", rich_text(line))
+
+    # 닫히지 않은 코드 블록도 버리지 않음
+    if code_buf:
+        yield from _blocks("code", list(_text_items("\n".join(code_buf))), language=code_lang)
+
+
+def md_to_notion_blocks(md: str):
+    return list(iter_notion_blocks(md))
+
+# --- Notion API 호출 속도 제한 (프로세스 전체 공유) ---
+NOTION_RATE_LIMIT = 3.0   # Notion 문서 기준 평균 초당 3회
+NOTION_BURST = 3          # 순간적으로 허용하는 최대 연속 호출 수
+MAX_BLOCKS_PER_APPEND = 100  # 블록 추가 요청 한 번에 넣을 수 있는 최대 블록 수 (Notion 제한)
+RETRYABLE_STATUSES = (409, 429, 503)
+NOTION_API_URL = os.getenv("NOTION_API_URL", "https://api.notion.com")  # benchmarks/의 로컬 테스트 서버용
+
+
+class TokenBucket:
+    """
+    초당 rate개씩 토큰이 채워지는 버킷. acquire()는 토큰이 생길 때까지 기다립니다.
+    서버가 Retry-After를 보내면 pause()로 그 시간 동안 모든 호출을 멈춥니다.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+                self.updated = max(self.updated, now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            # 멈춤이 끝나는 시점에 토큰 1개로 다시 시작
+            self.tokens = 1
+            self.updated = self.blocked_until
+
+
+# Streamlit 세션들이 같은 프로세스에서 이 모듈을 공유하므로, 모든 사용자가 하나의 예산을 나눠 씁니다.
+notion_limiter = TokenBucket(NOTION_RATE_LIMIT, NOTION_BURST)
+
+
+def _error_status_and_headers(error):
+    # notion_client는 APIResponseError(status, headers)를, httpx는 HTTPStatusError(response)를 던짐
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code, error.response.headers
+    if isinstance(error, HTTPResponseError):
+        return error.status, error.headers
+    return None, None
+
+
+def _retry_after(headers):
+    try:
+        return float(headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
 
 # --- Notion API를 안전하게 호출하는 함수 ---
-def safe_notion_call(fn, *args, **kwargs):
-    max_retries, delay = 8, 1.0
+def safe_notion_call(fn, *args, log=st.write, **kwargs):
+    """
+    공유 속도 제한기를 거쳐 Notion API를 호출합니다.
+    재시도 간격은 속도 제한기(와 서버의 Retry-After)만 결정하고, 별도의 sleep은 하지 않습니다.
+    """
+    max_retries = 8
     for attempt in range(max_retries):
+        start = time.perf_counter()
+        notion_limiter.acquire()
+        waited = time.perf_counter() - start
+        if waited > 0.001:
+            metrics.record("notion_rate_wait", waited)
         try:
-            st.write(f"API call attempt {attempt + 1}/{max_retries}")
-            result = fn(*args, **kwargs)
-            st.write("API call succeeded")
-            return result
-        except httpx.HTTPStatusError as e:
-            st.write(f"HTTP error: {e.response.status_code}")
-            if e.response.status_code in (409, 429, 503):
-                st.write(f"Retrying in {delay:.1f}s...")
-                time.sleep(delay); delay *= 1.7; continue
-            st.write("Non-retryable HTTP error")
-            raise
-        except Exception as ex:
-            st.write(f"Exception: {type(ex).__name__}: {str(ex)}")
-            time.sleep(delay); delay *= 1.7
+            return fn(*args, **kwargs)
+        except Exception as e:
+            status, headers = _error_status_and_headers(e)
+            if status is not None and status not in RETRYABLE_STATUSES:
+                raise
             if attempt == max_retries - 1:
-                st.write("Max retries exceeded")
+                log("Max retries exceeded")
                 raise
+            retry_after = _retry_after(headers)
+            metrics.record("notion_retry", status=str(status or type(e).__name__))
+            if retry_after is not None:
+                notion_limiter.pause(retry_after)
+            log(f"Retrying ({attempt + 1}/{max_retries}) after "
+                f"{status or type(e).__name__}" + (f", Retry-After {retry_after:.1f}s" if retry_after else ""))
+
+# --- Notion 클라이언트는 토큰마다 한 번만 만들어 재사용 (커넥션 풀 유지) ---
+@functools.lru_cache(maxsize=32)
+def get_notion_client(notion_token):
+    # 재시도는 safe_notion_call이 담당하므로 클라이언트 자체 재시도(sleep)는 끔
+    return Client(auth=notion_token, base_url=NOTION_API_URL, retry=False)
+
+
+# --- 블록 배치 추가 (중복 방지) ---
+def _block_signature(block):
+    # 보낸 블록(text.content)과 Notion이 돌려준 블록(plain_text)을 같은 기준으로 비교
+    body = block.get(block["type"], {})
+    text = "".join(item.get("plain_text") or item.get("text", {}).get("content", "")
+                   for item in body.get("rich_text", []))
+    return block["type"], text
+
+
+def find_appended(notion, page_id, blocks, after=None):
+    """
+    blocks와 같은 블록들이 after 블록 바로 뒤(after가 없으면 페이지 끝)에 이미 있으면
+    그 블록 객체들을, 없으면 None을 반환합니다.
+    """
+    found, cursor = [], after
+    while True:
+        kwargs = {"block_id": page_id, "page_size": 100}
+        if cursor:
+            kwargs["start_cursor"] = cursor
+        notion_limiter.acquire()
+        page = notion.blocks.children.list(**kwargs)
+        found += [b for b in page["results"] if b["id"] != after]
+        if not after:
+            found = found[-len(blocks):]
+        if not page.get("has_more") or (after and len(found) >= len(blocks)):
+            break
+        cursor = page["next_cursor"]
+    found = found[:len(blocks)]
+    if len(found) == len(blocks) and all(_block_signature(a) == _block_signature(b) for a, b in zip(found, blocks)):
+        return found
+    return None
+
+
+def append_blocks(notion, page_id, blocks, after=None, maybe_sent=False, insert=False, log=st.write):
+    """
+    블록 배치 하나를 페이지 끝에 추가하고 API 응답을 반환합니다. (insert=True면 after 블록 바로 뒤에 끼워 넣음)
+    409/503/네트워크 오류는 서버에 반영됐는지 알 수 없으므로, 재시도 전에 페이지를 읽어
+    이미 추가된 배치는 다시 보내지 않습니다. (after: 직전 배치의 마지막 블록 ID)
+    maybe_sent=True면 첫 시도부터 확인합니다. (프로세스가 전송 도중 종료된 경우)
+    """
+    uncertain = maybe_sent
+
+    def attempt():
+        nonlocal uncertain
+        if uncertain:
+            landed = find_appended(notion, page_id, blocks, after)
+            if landed is not None:
+                metrics.record("notion_dedup", blocks=len(blocks))
+                return {"object": "list", "results": landed}
+        try:
+            if insert and after:
+                return notion.blocks.children.append(block_id=page_id, children=blocks, after=after)
+            return notion.blocks.children.append(block_id=page_id, children=blocks)
+        except Exception as e:
+            status, _ = _error_status_and_headers(e)
+            # 429는 처리되지 않은 요청이 확실함
+            uncertain = uncertain or status != 429
+            raise
+
+    with metrics.stage("notion_batch", blocks=len(blocks),
+                       bytes=len(json.dumps(blocks, ensure_ascii=False).encode("utf-8"))):
+        return safe_notion_call(attempt, log=log)
+
+
+def section_header(title):
+    """
+    요약 구역의 시작: 구분선 + 제목(heading_2)
+    """
+    divider_block = {"object": "block", "type": "divider", "divider": {}}
+    title_block = {"object": "block", "type": "heading_2", "heading_2": {"rich_text": [{"type": "text", "text": {"content": title}}]}}
+    return [divider_block, title_block]
+
+
+def summary_blocks(title, summary_content):
+    """
+    구분선 + 제목(heading_2) + 요약 본문 블록 리스트를 만듭니다.
+    """
+    with metrics.stage("md_convert") as m:
+        blocks = md_to_notion_blocks(summary_content)
+        m["blocks"] = len(blocks)
+    return section_header(title) + blocks
+
 
 # --- Streamlit function for sending content to Notion ---
-def send_to_notion(notion_token, page_id, title, summary_content):
+def send_to_notion(notion_token, page_id, title, summary_content, log=st.write):
     """
     LLM이 생성한 요약 내용을 Notion 페이지에 추가합니다.
     """
-    st.write("Initializing Notion client...")
+    log("Initializing Notion client...")
     try:
-        notion = Client(auth=notion_token)
-        st.write("Notion client initialized successfully")
+        notion = get_notion_client(notion_token)
+        log("Notion client initialized successfully")
     except Exception as e:
         st.error(f"Failed to initialize Notion client: {type(e).__name__}: {str(e)}")
         raise
     
-    st.write("Creating title block...")
-    title_block = {"object": "block", "type": "heading_2", "heading_2": {"rich_text": [{"type": "text", "text": {"content": title}}]}}
-    
-    st.write("Converting markdown to Notion blocks...")
+    log("Converting markdown to Notion blocks...")
     try:
-        summary_blocks = md_to_notion_blocks(summary_content)
-        st.write(f"Created {len(summary_blocks)} blocks from markdown")
+        all_blocks = summary_blocks(title, summary_content)
+        log(f"Created {len(all_blocks) - 2} blocks from markdown")
     except Exception as e:
         st.error(f"Failed to convert markdown: {type(e).__name__}: {str(e)}")
         raise
     
-    divider_block = {"object": "block", "type": "divider", "divider": {}}
-    all_blocks = [divider_block, title_block] + summary_blocks
-    st.write(f"Total blocks to send: {len(all_blocks)}")
+    log(f"Total blocks to send: {len(all_blocks)}")
     
-    for i in range(0, len(all_blocks), 100):
-        batch_size = min(100, len(all_blocks) - i)
-        st.write(f"Sending blocks {i+1} to {i+batch_size} of {len(all_blocks)}...")
+    # 같은 페이지에 붙는 배치는 순서가 중요하므로 차례대로 보내고, 속도는 notion_limiter가 조절
+    last_block_id = None
+    for i in range(0, len(all_blocks), MAX_BLOCKS_PER_APPEND):
+        batch_size = min(MAX_BLOCKS_PER_APPEND, len(all_blocks) - i)
+        log(f"Sending blocks {i+1} to {i+batch_size} of {len(all_blocks)}...")
         
         try:
-            safe_notion_call(
-                notion.blocks.children.append,
-                block_id=page_id,
-                children=all_blocks[i:i+100]
-            )
-            st.write(f"Successfully sent blocks {i+1} to {i+batch_size}")
+            response = append_blocks(notion, page_id, all_blocks[i:i+batch_size], after=last_block_id, log=log)
+            if response.get("results"):
+                last_block_id = response["results"][-1]["id"]
+            log(f"Successfully sent blocks {i+1} to {i+batch_size}")
         except Exception as e:
             st.error(f"Failed to send blocks: {type(e).__name__}: {str(e)}")
             raise
-        
-        time.sleep(0.3)
     
-    st.write("All blocks sent successfully!")
\ No newline at end of file
+    log("All blocks sent successfully!")
+
+
+# --- 이미 작성한 요약 구역을 바뀐 블록만 고치기 ---
+SECTION_TITLE_RE = re.compile(r"^Commit 요약 \(.+\)$")  # send_to_notion으로 작성한 요약 구역의 제목
+_ANNOTATION_KEYS = ("bold", "italic", "code", "strikethrough", "underline")
+
+
+def _block_content(block):
+    """
+    블록 내용을 비교용 값으로 바꿉니다. Notion이 돌려준 블록(기본값이 채워진 annotations, plain_text)과
+    md_to_notion_blocks가 만든 블록이 같은 내용이면 같은 값이 되도록, 서식이 같은 이웃 rich_text는 합칩니다.
+    """
+    body = block.get(block["type"], {})
+    runs = []
+    for item in body.get("rich_text", []):
+        style = (tuple(k for k in _ANNOTATION_KEYS if (item.get("annotations") or {}).get(k)),
+                 ((item.get("text") or {}).get("link") or {}).get("url"))
+        text = (item.get("text") or {}).get("content", item.get("plain_text", ""))
+        if runs and runs[-1][0] == style:
+            runs[-1] = (style, runs[-1][1] + text)
+        else:
+            runs.append((style, text))
+    return block["type"], tuple(runs), body.get("language"), body.get("checked")
+
+
+def list_children(notion, block_id, log=st.write):
+    blocks, cursor = [], None
+    while True:
+        kwargs = {"block_id": block_id, "page_size": 100}
+        if cursor:
+            kwargs["start_cursor"] = cursor
+        page = safe_notion_call(notion.blocks.children.list, log=log, **kwargs)
+        blocks += page["results"]
+        if not page.get("has_more"):
+            return blocks
+        cursor = page["next_cursor"]
+
+
+# md_to_notion_blocks가 만들 수 있는 블록 종류 (그 밖의 블록은 사용자가 직접 넣은 것)
+_MD_BLOCK_TYPES = {"paragraph", "heading_1", "heading_2", "heading_3", "bulleted_list_item",
+                   "numbered_list_item", "to_do", "quote", "code", "divider"}
+
+
+def _author(block):
+    return (block.get("created_by") or {}).get("id")
+
+
+def _is_written_by_us(block, heading):
+    # 제목을 쓴 주체(integration)가 만든, md_to_notion_blocks 형태의 블록인지
+    return (block["type"] in _MD_BLOCK_TYPES and not block.get("has_children")
+            and _author(block) == _author(heading))
+
+
+def find_section(blocks, title, end_block_id=None):
+    """
+    페이지 블록 리스트에서 title 제목(heading_2)으로 시작하는 마지막 요약 구역을 찾아
+    (제목 블록, 본문 블록 리스트)를 반환합니다. 본문에는 이 코드가 쓴 블록만 담습니다.
+    - end_block_id(전송 대기열이 기록한 구역의 마지막 블록)가 제목 뒤에 있으면 그 블록까지
+    - 없으면 다음 요약 구역(구분선 + 요약 제목)이나, 우리가 쓴 블록이 아닌 첫 블록
+      (md_to_notion_blocks가 만들 수 없는 종류, 하위 블록 있음, 제목과 작성자가 다름) 직전까지
+    사용자가 요약 뒤나 중간에 직접 쓴 내용은 본문에 넣지 않으므로 update_section이 지우지 않습니다.
+    """
+    def is_title(block, match):
+        return block["type"] == "heading_2" and bool(match(_block_signature(block)[1]))
+
+    starts = [i for i, block in enumerate(blocks) if is_title(block, lambda text: text == title)]
+    if not starts:
+        return None
+    start = starts[-1]
+    heading = blocks[start]
+    ids = [block["id"] for block in blocks]
+    known_end = ids.index(end_block_id, start) if end_block_id in ids[start:] else None
+
+    end = start + 1
+    limit = known_end + 1 if known_end is not None else len(blocks)
+    while end < limit and not (blocks[end]["type"] == "divider" and end + 1 < len(blocks)
+                               and is_title(blocks[end + 1], SECTION_TITLE_RE.match)):
+        if known_end is None and not _is_written_by_us(blocks[end], heading):
+            break
+        end += 1
+    # 알려진 경계 안에 사용자가 끼워 넣은 블록은 건드리지 않음
+    return heading, [block for block in blocks[start + 1:end] if _is_written_by_us(block, heading)]
+
+
+def delete_block(notion, block_id, log=st.write):
+    # 반영됐는지 모르는 삭제를 다시 보냈을 때의 '이미 삭제됨'(400/404) 응답은 성공으로 봄
+    uncertain = False
+
+    def attempt():
+        nonlocal uncertain
+        try:
+            return notion.blocks.delete(block_id=block_id)
+        except Exception as e:
+            status, _ = _error_status_and_headers(e)
+            if uncertain and status in (400, 404):
+                return None
+            uncertain = uncertain or status != 429
+            raise
+
+    return safe_notion_call(attempt, log=log)
+
+
+def update_section(notion, page_id, title, new_blocks, end_block_id=None, log=st.write):
+    """
+    title 구역의 본문을 new_blocks로 바꾸고 ({"updated", "inserted", "deleted"} 블록 수, 구역의 마지막 블록 ID)를
+    반환합니다. 내용이 같은 블록은 그대로 두고, 바뀐 블록은 종류가 같으면 제자리에서 수정,
+    그 밖에는 필요한 위치에 끼워 넣거나 삭제합니다. 구역이 없으면 페이지 끝에 새로 추가합니다.
+    end_block_id를 알면 그 블록 뒤는 절대 고치거나 지우지 않습니다. (find_section 참고)
+    """
+    counts = {"updated": 0, "inserted": 0, "deleted": 0}
+    section = find_section(list_children(notion, page_id, log=log), title, end_block_id=end_block_id)
+    if section is None:
+        blocks, last_block_id = section_header(title) + new_blocks, None
+        for i in range(0, len(blocks), MAX_BLOCKS_PER_APPEND):
+            response = append_blocks(notion, page_id, blocks[i:i + MAX_BLOCKS_PER_APPEND], after=last_block_id, log=log)
+            if response.get("results"):
+                last_block_id = response["results"][-1]["id"]
+        counts["inserted"] = len(blocks)
+        return counts, last_block_id
+
+    heading, old_blocks = section
+    old_keys = [_block_content(b) for b in old_blocks]
+    new_keys = [_block_content(b) for b in new_blocks]
+    pending, prev_id = [], heading["id"]  # 끼워 넣을 블록들과 그 바로 앞 블록 ID
+
+    def flush():
+        nonlocal prev_id
+        for i in range(0, len(pending), MAX_BLOCKS_PER_APPEND):
+            response = append_blocks(notion, page_id, pending[i:i + MAX_BLOCKS_PER_APPEND],
+                                     after=prev_id, insert=True, log=log)
+            prev_id = response["results"][-1]["id"]
+        counts["inserted"] += len(pending)
+        pending.clear()
+
+    matcher = difflib.SequenceMatcher(a=old_keys, b=new_keys, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            flush()
+            prev_id = old_blocks[i2 - 1]["id"]
+            continue
+        for k in range(max(i2 - i1, j2 - j1)):
+            old_block = old_blocks[i1 + k] if i1 + k < i2 else None
+            new_block = new_blocks[j1 + k] if j1 + k < j2 else None
+            if old_block and new_block and old_block["type"] == new_block["type"]:
+                flush()
+                if old_keys[i1 + k] != new_keys[j1 + k]:
+                    block_type = new_block["type"]
+                    safe_notion_call(notion.blocks.update, block_id=old_block["id"], log=log,
+                                     **{block_type: new_block[block_type]})
+                    counts["updated"] += 1
+                prev_id = old_block["id"]
+                continue
+            if old_block:
+                delete_block(notion, old_block["id"], log=log)
+                counts["deleted"] += 1
+            if new_block:
+                pending.append(new_block)
+    flush()
+    # 마지막으로 남기거나 넣은 블록이 구역의 새 끝 (다음 수정 때 경계로 사용)
+    return counts, prev_id
+
+
+def update_in_notion(notion_token, page_id, title, summary_content, end_block_id=None, log=st.write):
+    """
+    같은 제목("Commit 요약 (<sha7>)")으로 이미 작성한 구역을 새 요약 내용으로 고칩니다.
+    전체를 다시 쓰지 않고 바뀐 블록만 보내므로 페이지가 계속 길어지지 않습니다.
+    end_block_id: 구역의 마지막 블록 ID를 알고 있으면 넘김 (모르면 작성자·블록 종류로 구역 끝을 판단)
+    """
+    notion = get_notion_client(notion_token)
+    with metrics.stage("md_convert") as m:
+        blocks = md_to_notion_blocks(summary_content)
+        m["blocks"] = len(blocks)
+    with metrics.stage("notion_update") as m:
+        counts, _ = update_section(notion, page_id, title, blocks, end_block_id=end_block_id, log=log)
+        m.update(counts)
+    log(f"Updated {counts['updated']}, inserted {counts['inserted']}, deleted {counts['deleted']} blocks")
+    return counts
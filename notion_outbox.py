@@ -0,0 +1,309 @@
+# 파일명: notion_outbox.py
+# 실행: python notion_outbox.py          대기열 상태 보기
+#       python notion_outbox.py --drain  남은 작업을 NOTION_TOKEN으로 모두 전송
+#
+# 📮 Notion 전송 대기열 (outbox)
+# 요약을 바로 Notion에 보내지 않고, 먼저 블록 배치(100개 단위)로 나눠 SQLite에 저장한 뒤
+# 백그라운드 스레드가 순서대로 보냅니다.
+# - 같은 (페이지, 제목, 요약) 조합은 한 번만 저장·전송 (두 번 눌러도 다시 보내지 않음)
+# - 배치마다 전송 완료(ack)를 기록하므로, 중간에 프로세스가 꺼져도 완료된 배치 다음부터 이어서 보냄
+# - 전송 도중 꺼진 배치는 페이지 끝을 확인해 이미 들어간 경우 다시 보내지 않음
+# - update 작업은 같은 제목의 기존 구역을 찾아 바뀐 블록만 고침 (다시 실행해도 결과가 같으므로 그대로 재시도)
+# Notion 토큰은 디스크에 저장하지 않고, 작업에는 토큰 해시만 기록합니다.
+# (재시작 후에는 같은 토큰이 다시 등록되거나 NOTION_TOKEN 환경 변수가 같을 때 이어서 전송)
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+from notion_client.errors import HTTPResponseError
+
+import metrics
+import notion_handler
+
+OUTBOX_PATH = os.getenv("NOTION_OUTBOX_PATH", os.path.join(".cache", "notion_outbox.sqlite3"))
+RETRY_DELAY = 30       # 전송에 실패한 작업을 다시 시도하기까지 기다리는 시간(초)
+MAX_JOB_ATTEMPTS = 5   # 이 횟수만큼 실패하면 failed로 표시하고 멈춤
+
+
+def make_key(*parts):
+    raw = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def token_fingerprint(notion_token):
+    return hashlib.sha256(notion_token.encode("utf-8")).hexdigest()[:16]
+
+
+class NotionOutbox:
+    """
+    jobs:    요약 하나 = 작업 하나 (mode: append / update, status: pending / done / failed)
+    batches: 작업별 블록 배치 (state: pending / sending / acked)
+             update 작업은 본문 블록 전체를 배치 하나로 저장
+    """
+
+    def __init__(self, path=OUTBOX_PATH, log=print):
+        self.path = path
+        self.log = log
+        self._lock = threading.Lock()
+        self._tokens = {}  # 토큰 해시 -> 토큰 (메모리에만 보관)
+        self._wakeup = threading.Event()
+        self._thread = None
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " key TEXT PRIMARY KEY,"
+                " page_id TEXT NOT NULL,"
+                " title TEXT NOT NULL,"
+                " mode TEXT NOT NULL DEFAULT 'append',"
+                " token_fp TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " total_batches INTEGER NOT NULL,"
+                " last_block_id TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " next_try REAL NOT NULL DEFAULT 0,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS batches ("
+                " key TEXT NOT NULL,"
+                " seq INTEGER NOT NULL,"
+                " blocks TEXT NOT NULL,"
+                " state TEXT NOT NULL,"
+                " PRIMARY KEY (key, seq))"
+            )
+            # 이전 버전에서 만든 파일에는 mode 열이 없음
+            if "mode" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN mode TEXT NOT NULL DEFAULT 'append'")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def register_token(self, notion_token):
+        """
+        이 토큰으로 만든 작업을 전송할 수 있게 합니다. (재시작 후 남은 작업 재개용)
+        """
+        if notion_token:
+            self._tokens[token_fingerprint(notion_token)] = notion_token
+            self._wakeup.set()
+
+    def enqueue(self, notion_token, page_id, title, summary_content, update=False):
+        """
+        요약을 대기열에 넣고 (작업 키, 상태)를 반환합니다.
+        update=True면 페이지 끝에 추가하는 대신 같은 제목의 기존 구역을 고칩니다.
+        상태는 다음 중 하나입니다.
+        - "created": 새 작업을 추가함
+        - "requeued": 실패했던 작업(update 작업은 완료된 작업도)을 다시 시도하도록 되돌림
+        - "exists": 이미 전송했거나 전송 중인 작업이라 다시 넣지 않음
+        """
+        mode = "update" if update else "append"
+        key = make_key(page_id, title, summary_content, mode) if update else make_key(page_id, title, summary_content)
+        self.register_token(notion_token)
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT status FROM jobs WHERE key = ?", (key,)).fetchone()
+            state = "exists"
+            if row is None:
+                state = "created"
+                if update:
+                    batches = [notion_handler.md_to_notion_blocks(summary_content)]
+                else:
+                    blocks = notion_handler.summary_blocks(title, summary_content)
+                    step = notion_handler.MAX_BLOCKS_PER_APPEND
+                    batches = [blocks[i:i + step] for i in range(0, len(blocks), step)]
+                now = time.time()
+                conn.execute(
+                    "INSERT INTO jobs (key, page_id, title, mode, token_fp, status, total_batches, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, 'pending', ?, ?, ?)",
+                    (key, page_id, title, mode, token_fingerprint(notion_token), len(batches), now, now),
+                )
+                conn.executemany(
+                    "INSERT INTO batches (key, seq, blocks, state) VALUES (?, ?, ?, 'pending')",
+                    [(key, seq, json.dumps(batch, ensure_ascii=False)) for seq, batch in enumerate(batches)],
+                )
+            elif row[0] == "failed" or (update and row[0] == "done"):
+                # 그 사이 페이지가 다른 내용으로 바뀌었을 수 있으므로 update 작업은 다시 맞춰 봄
+                state = "requeued"
+                conn.execute(
+                    "UPDATE jobs SET status = 'pending', attempts = 0, next_try = 0, error = NULL,"
+                    " token_fp = ?, updated_at = ? WHERE key = ?",
+                    (token_fingerprint(notion_token), time.time(), key),
+                )
+                if update:
+                    conn.execute("UPDATE batches SET state = 'pending' WHERE key = ?", (key,))
+        self.start()
+        self._wakeup.set()
+        return key, state
+
+    def status(self, key):
+        with self._lock, self._connect() as conn:
+            return self._job_rows(conn, "WHERE j.key = ?", (key,))[0]
+
+    def recent(self, limit=10):
+        with self._lock, self._connect() as conn:
+            return self._job_rows(conn, "ORDER BY j.created_at DESC LIMIT ?", (limit,))
+
+    def _job_rows(self, conn, where, params):
+        rows = conn.execute(
+            "SELECT j.key, j.page_id, j.title, j.status, j.total_batches, j.error,"
+            " (SELECT COUNT(*) FROM batches b WHERE b.key = j.key AND b.state = 'acked')"
+            f" FROM jobs j {where}",
+            params,
+        ).fetchall()
+        return [{"key": r[0], "page_id": r[1], "title": r[2], "status": r[3], "total": r[4],
+                 "error": r[5], "acked": r[6]} for r in rows]
+
+    def _next_job(self):
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, page_id, title, mode, token_fp, last_block_id FROM jobs"
+                " WHERE status = 'pending' AND next_try <= ? ORDER BY created_at",
+                (time.time(),),
+            ).fetchall()
+        for key, page_id, title, mode, token_fp, last_block_id in rows:
+            if token_fp in self._tokens:
+                return key, page_id, title, mode, self._tokens[token_fp], last_block_id
+        return None
+
+    def _send_job(self, key, page_id, title, mode, notion_token, last_block_id):
+        notion = notion_handler.get_notion_client(notion_token)
+        with self._lock, self._connect() as conn:
+            batches = conn.execute(
+                "SELECT seq, blocks, state FROM batches WHERE key = ? AND state != 'acked' ORDER BY seq", (key,)
+            ).fetchall()
+
+        if mode == "update":
+            counts, last_block_id = notion_handler.update_section(
+                notion, page_id, title, json.loads(batches[0][1]),
+                end_block_id=self._section_end(page_id, title), log=self.log
+            )
+            self.log(f"📮 {page_id}: {title} 수정 {counts['updated']}, 추가 {counts['inserted']}, "
+                     f"삭제 {counts['deleted']} 블록")
+            with self._lock, self._connect() as conn:
+                conn.execute("UPDATE batches SET state = 'acked' WHERE key = ?", (key,))
+                conn.execute("UPDATE jobs SET status = 'done', last_block_id = ?, error = NULL, updated_at = ?"
+                             " WHERE key = ?", (last_block_id, time.time(), key))
+            return
+
+        for seq, blocks_json, state in batches:
+            with self._lock, self._connect() as conn:
+                conn.execute("UPDATE batches SET state = 'sending' WHERE key = ? AND seq = ?", (key, seq))
+            response = notion_handler.append_blocks(
+                notion, page_id, json.loads(blocks_json), after=last_block_id,
+                maybe_sent=state == "sending", log=self.log
+            )
+            if response.get("results"):
+                last_block_id = response["results"][-1]["id"]
+            with self._lock, self._connect() as conn:
+                conn.execute("UPDATE batches SET state = 'acked' WHERE key = ? AND seq = ?", (key, seq))
+                conn.execute("UPDATE jobs SET last_block_id = ?, updated_at = ? WHERE key = ?",
+                             (last_block_id, time.time(), key))
+
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'done', error = NULL, updated_at = ? WHERE key = ?",
+                         (time.time(), key))
+            # 보낸 블록은 더 이상 필요 없으므로 지워서 파일이 커지지 않게 함
+            conn.execute("UPDATE batches SET blocks = '[]' WHERE key = ?", (key,))
+
+    def _section_end(self, page_id, title):
+        """
+        이 대기열이 마지막으로 쓰거나 고친 title 구역의 마지막 블록 ID (모르면 None)
+        update 작업은 이 블록 뒤의 내용(사용자가 직접 쓴 메모 등)을 건드리지 않습니다.
+        """
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT last_block_id FROM jobs WHERE page_id = ? AND title = ? AND status = 'done'"
+                " AND last_block_id IS NOT NULL ORDER BY updated_at DESC LIMIT 1",
+                (page_id, title),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _fail(self, key, error):
+        # 요청 형식/권한 오류는 다시 보내도 실패하므로 바로 failed, 그 외는 RETRY_DELAY 뒤 재시도
+        permanent = isinstance(error, HTTPResponseError) and error.status not in notion_handler.RETRYABLE_STATUSES
+        with self._lock, self._connect() as conn:
+            attempts = conn.execute("SELECT attempts FROM jobs WHERE key = ?", (key,)).fetchone()[0] + 1
+            status = "failed" if permanent or attempts >= MAX_JOB_ATTEMPTS else "pending"
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, next_try = ?, error = ?, updated_at = ? WHERE key = ?",
+                (status, attempts, time.time() + RETRY_DELAY, f"{type(error).__name__}: {error}", time.time(), key),
+            )
+        return status
+
+    def drain(self):
+        """
+        지금 보낼 수 있는 작업을 모두 보내고, 완료한 작업 수를 반환합니다.
+        """
+        done = 0
+        while True:
+            job = self._next_job()
+            if job is None:
+                return done
+            key, page_id = job[0], job[1]
+            try:
+                with metrics.start_run("outbox", page=page_id):
+                    self._send_job(*job)
+                done += 1
+                self.log(f"📮 {page_id}: 전송 완료 ({key[:8]})")
+            except Exception as e:
+                status = self._fail(key, e)
+                self.log(f"❌ {page_id}: 전송 실패 ({key[:8]}, {status}): {type(e).__name__}: {e}")
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            self.drain()
+            self._wakeup.wait(timeout=RETRY_DELAY)
+
+    def start(self):
+        """
+        백그라운드 전송 스레드를 (한 번만) 시작합니다.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="notion-outbox", daemon=True)
+                self._thread.start()
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox():
+    """
+    프로세스 전체에서 공유하는 대기열을 반환합니다. (Streamlit 세션들이 함께 사용)
+    """
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = NotionOutbox()
+            _outbox.register_token(os.getenv("NOTION_TOKEN"))
+            _outbox.start()
+        return _outbox
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Notion 전송 대기열 상태 확인 / 남은 작업 전송")
+    parser.add_argument("--drain", action="store_true", help="NOTION_TOKEN으로 남은 작업을 모두 전송")
+    args = parser.parse_args()
+
+    outbox = NotionOutbox()
+    if args.drain:
+        outbox.register_token(os.getenv("NOTION_TOKEN"))
+        print(f"📮 {outbox.drain()}개 작업 전송 완료")
+    for job in outbox.recent(limit=20):
+        print(f"{job['status']:<8} {job['acked']}/{job['total']}  {job['title']}  → {job['page_id']}"
+              + (f"  ({job['error']})" if job["error"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# 파일명: summary_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# 💾 LLM 요약 결과를 디스크에 저장하는 캐시
+# 같은 커밋 + 같은 모델/설정 + 같은 프롬프트라면 LLM을 다시 호출하지 않습니다.
+CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join(".cache", "summaries.sqlite3"))
+MAX_CACHE_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+
+def make_key(repo, commit_sha, model, temperature, prompt_hash):
+    """
+    (owner/repo, 커밋 SHA, 모델, temperature, 프롬프트 해시)로 캐시 키를 만듭니다.
+    """
+    raw = json.dumps([repo, commit_sha, model, float(temperature), prompt_hash], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    SQLite 파일 하나에 요약을 저장하고, 전체 크기가 max_bytes를 넘으면
+    가장 오래 사용되지 않은 항목부터 지우는 LRU 캐시입니다.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                " key TEXT PRIMARY KEY,"
+                " summary TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON summaries(last_access)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE summaries SET last_access = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key, summary):
+        size = len(summary.encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, summary, size, time.time()),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM summaries ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+            total -= size
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    프로세스에서 공유하는 기본 캐시 인스턴스를 반환합니다.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SummaryCache()
+        return _default_cache
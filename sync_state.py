@@ -0,0 +1,170 @@
+# 파일명: sync_state.py
+# 실행: python sync_state.py sync_targets.json
+#
+# (repo, branch, Notion 페이지)마다 마지막으로 요약한 커밋을 기억해 두고,
+# 그 이후에 새로 올라온 커밋만 요약해 Notion에 추가합니다. cron 등으로 주기적으로 실행하면 됩니다.
+#
+# sync_targets.json 예시:
+#   [{"owner": "human1234", "repo": "TensorFlow", "branch": "main", "page_id": "<Notion 페이지 ID>"}]
+# 토큰은 GITHUB_TOKEN, NOTION_TOKEN 환경 변수에서 읽습니다.
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+
+import diff_filter
+import message
+import metrics
+import notion_handler
+
+SYNC_DB_PATH = os.getenv("SYNC_DB_PATH", os.path.join(".cache", "sync_state.sqlite3"))
+
+
+class SyncStateStore:
+    """
+    마지막 동기화 커밋 SHA와 GitHub 응답 ETag를 SQLite에 저장합니다.
+    message.github_get의 etag_store로도 사용할 수 있습니다.
+    """
+
+    def __init__(self, path=SYNC_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                " repo TEXT NOT NULL,"
+                " branch TEXT NOT NULL,"
+                " page_id TEXT NOT NULL,"
+                " last_sha TEXT NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (repo, branch, page_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS etags ("
+                " url TEXT PRIMARY KEY,"
+                " etag TEXT NOT NULL,"
+                " body TEXT NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_last_sha(self, repo, branch, page_id):
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT last_sha FROM sync_state WHERE repo = ? AND branch = ? AND page_id = ?",
+                (repo, branch, page_id),
+            ).fetchone()
+            return row[0] if row else None
+
+    def set_last_sha(self, repo, branch, page_id, sha):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (repo, branch, page_id, last_sha, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (repo, branch, page_id, sha, time.time()),
+            )
+
+    def get_etag(self, url):
+        with self._lock, self._connect() as conn:
+            return conn.execute("SELECT etag, body FROM etags WHERE url = ?", (url,)).fetchone()
+
+    def put_etag(self, url, etag, body):
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO etags (url, etag, body) VALUES (?, ?, ?)", (url, etag, body))
+
+
+def sync_repo(store, owner, repo, branch, page_id, github_token, notion_token, log=print):
+    """
+    마지막 동기화 이후의 새 커밋만 요약해 Notion에 추가하고, 처리한 커밋 수를 반환합니다.
+    처음 실행할 때는 현재 브랜치 최신 커밋을 시작점으로 기록만 합니다. (이전 기록은 웹 UI의 백필 모드 사용)
+    """
+    full_name = f"{owner}/{repo}"
+    last_sha = store.get_last_sha(full_name, branch, page_id)
+    if last_sha is None:
+        head = message.get_branch_head(owner, repo, branch, github_token=github_token, etag_store=store)
+        if head is None:
+            return 0
+        store.set_last_sha(full_name, branch, page_id, head)
+        log(f"📌 {full_name}@{branch}: 시작점 {head[:7]} 기록")
+        return 0
+
+    shas = message.list_commits(owner, repo, github_token=github_token, base=last_sha, head=branch,
+                                etag_store=store)
+    if not shas:
+        log(f"💤 {full_name}@{branch}: 새 커밋 없음")
+        return 0
+
+    all_changes = message.get_commits_changes(owner, repo, shas, github_token=github_token)
+    processed = 0
+    for sha in shas:
+        changes = all_changes[sha]
+        if changes is None:
+            log(f"❌ {full_name}@{sha[:7]}: 변경 내역을 가져오지 못해 여기서 멈춥니다.")
+            break
+        if changes:
+            changes, filter_report = diff_filter.filter_changes(changes)
+            log(f"🧹 {full_name}@{sha[:7]} {diff_filter.format_report(filter_report)}")
+            summary = message.summarize_changes(
+                changes,
+                repo=full_name,
+                commit_sha=sha,
+                model=message.SUMMARY_MODEL,
+                system_prompt=message.SUMMARY_SYSTEM_PROMPT
+            )
+            notion_handler.send_to_notion(
+                notion_token=notion_token,
+                page_id=page_id,
+                title=f"Commit 요약 ({sha[:7]})",
+                summary_content=summary,
+                log=lambda *_: None
+            )
+        # Notion에 쓴 커밋까지만 진행 상태를 저장 → 중간에 실패해도 다음 실행에서 이어서 처리
+        store.set_last_sha(full_name, branch, page_id, sha)
+        processed += 1
+        log(f"✅ {full_name}@{sha[:7]} 동기화 완료")
+    return processed
+
+
+def main():
+    load_dotenv()
+    if len(sys.argv) != 2:
+        raise SystemExit("사용법: python sync_state.py sync_targets.json")
+
+    with open(sys.argv[1], encoding="utf-8") as f:
+        targets = json.load(f)
+
+    store = SyncStateStore()
+    failed = []
+    for target in targets:
+        full_name = f"{target.get('owner')}/{target.get('repo')}"
+        # 저장소 하나가 실패해도(권한, 토큰 예산 초과, Notion 오류 등) 나머지 저장소는 계속 동기화
+        try:
+            with metrics.start_run("sync", repo=full_name):
+                sync_repo(
+                    store,
+                    owner=target["owner"],
+                    repo=target["repo"],
+                    branch=target.get("branch", "main"),
+                    page_id=target["page_id"],
+                    github_token=os.getenv("GITHUB_TOKEN"),
+                    notion_token=os.getenv("NOTION_TOKEN"),
+                )
+        except Exception as e:
+            print(f"❌ {full_name} 동기화 실패: {type(e).__name__}: {e}")
+            failed.append(full_name)
+
+    if failed:
+        # cron 등에서 실패를 알 수 있도록 0이 아닌 종료 코드로 끝냄
+        raise SystemExit(f"❌ {len(failed)}/{len(targets)}개 저장소 동기화 실패: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
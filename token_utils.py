@@ -0,0 +1,97 @@
+# 파일명: token_utils.py
+
+import functools
+import math
+
+# 🔢 토큰 수 계산 및 diff 청크 분할 유틸리티
+
+
+@functools.lru_cache(maxsize=8)
+def _get_encoding(model):
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # tiktoken이 없거나 인코딩 파일을 받을 수 없는 환경(오프라인 등)
+        return None
+
+
+def count_tokens(text, model="gpt-4o"):
+    """
+    텍스트의 토큰 수를 계산합니다.
+    tiktoken을 쓸 수 없으면 UTF-8 바이트 수 / 4 로 대략 추정합니다.
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return math.ceil(len(text.encode("utf-8")) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_hunks(patch):
+    """
+    unified diff 패치를 '@@'로 시작하는 hunk 단위로 나눕니다.
+    """
+    hunks, current = [], []
+    for line in patch.splitlines(keepends=True):
+        if line.startswith("@@") and current:
+            hunks.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        hunks.append("".join(current))
+    return hunks
+
+
+def _split_lines(text, budget, model):
+    # hunk 하나가 예산보다 클 때 줄 단위로 잘라 예산 안에 맞춤
+    pieces, current, current_tokens = [], [], 0
+    for line in text.splitlines(keepends=True):
+        tokens = count_tokens(line, model)
+        if current and current_tokens + tokens > budget:
+            pieces.append("".join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += tokens
+    if current:
+        pieces.append("".join(current))
+    return pieces
+
+
+def chunk_changes(changes, budget, model="gpt-4o", format_change=None):
+    """
+    변경 내역 리스트를 각각 budget 토큰 이하인 텍스트 청크로 묶습니다.
+    - 파일 단위로 최대한 함께 묶고
+    - 파일 하나가 예산을 넘으면 hunk 단위로, hunk도 넘으면 줄 단위로 나눕니다.
+    """
+    if format_change is None:
+        format_change = lambda c, patch: f"📄 파일명: {c['filename']} ({c['status']})\n{patch}"
+
+    pieces = []
+    for c in changes:
+        text = format_change(c, c['patch'])
+        if count_tokens(text, model) <= budget:
+            pieces.append(text)
+            continue
+        for hunk in split_hunks(c['patch']):
+            part = format_change(c, hunk)
+            if count_tokens(part, model) <= budget:
+                pieces.append(part)
+                continue
+            header_tokens = count_tokens(format_change(c, ""), model)
+            for sub in _split_lines(hunk, max(1, budget - header_tokens), model):
+                pieces.append(format_change(c, sub))
+
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        tokens = count_tokens(piece, model)
+        if current and current_tokens + tokens > budget:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
@@ -0,0 +1,271 @@
+# 파일명: webhook_server.py
+# 실행: python webhook_server.py --port 8000
+#
+# GitHub push 웹훅을 받아 커밋마다 diff 조회 → 학습 요약 → Notion 추가를 자동으로 실행하는 서버입니다.
+# 필요한 환경 변수:
+#   GITHUB_WEBHOOK_SECRET  웹훅 설정에 입력한 Secret (서명 검증용, 필수)
+#   GITHUB_TOKEN           커밋 diff 조회용 토큰
+#   NOTION_TOKEN           Notion Integration 토큰
+#   NOTION_PAGE_ID         요약을 추가할 기본 Notion 페이지 ID
+#   NOTION_PAGE_MAP        (선택) 리포지토리별 페이지 ID. 예: {"owner/repo": "page_id"}
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dotenv import load_dotenv
+
+import diff_filter
+import message
+import metrics
+import notion_handler
+
+load_dotenv()
+
+WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+NOTION_TOKEN = os.getenv("NOTION_TOKEN")
+NOTION_PAGE_ID = os.getenv("NOTION_PAGE_ID")
+NOTION_PAGE_MAP = json.loads(os.getenv("NOTION_PAGE_MAP", "{}"))
+
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", 4))                # 동시에 처리하는 리포지토리 수
+MAX_PENDING_PER_REPO = int(os.getenv("MAX_PENDING_PER_REPO", 200))   # 리포지토리별 대기열 상한
+SEEN_COMMITS_LIMIT = 10000                                            # 중복 검사용으로 기억하는 커밋 수
+
+
+class Backpressure(Exception):
+    pass
+
+
+class JournalQueue:
+    """
+    리포지토리별 대기열(lane)에 커밋을 쌓고, 워커 풀에서 처리합니다.
+    - 같은 리포지토리의 커밋은 push 순서대로 하나씩 처리 (Notion 페이지에 순서대로 쌓이도록)
+    - 서로 다른 리포지토리는 최대 max_workers개까지 동시에 처리
+    - 이미 받은 커밋은 다시 넣지 않고, 밀린 작업이 있는데 대기열이 가득 찬 리포지토리는 Backpressure를 던집니다.
+      (GitHub는 실패한 웹훅을 자동으로 다시 보내지 않으므로, 대기열이 비어 있으면 상한보다 큰 push도 모두 받음)
+    """
+
+    def __init__(self, process, max_workers=WEBHOOK_WORKERS, max_pending_per_repo=MAX_PENDING_PER_REPO):
+        self.process = process
+        self.max_pending_per_repo = max_pending_per_repo
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.lock = threading.Lock()
+        self.lanes = {}
+        self.active = set()
+        self.seen = OrderedDict()
+        self.idle = threading.Condition(self.lock)
+
+    def submit(self, repo, shas):
+        """
+        커밋들을 대기열에 넣고 (새로 넣은 개수, 중복 개수)를 반환합니다.
+        이미 밀린 커밋이 있고 대기열에 다 들어가지 않으면 아무것도 넣지 않고 Backpressure를 던집니다.
+        대기열이 비어 있으면 큰 merge나 첫 push처럼 상한보다 많은 커밋도 모두 넣습니다.
+        """
+        with self.lock:
+            lane = self.lanes.setdefault(repo, deque())
+            new = [sha for sha in dict.fromkeys(shas) if (repo, sha) not in self.seen]
+            if lane and len(lane) + len(new) > self.max_pending_per_repo:
+                raise Backpressure(f"{repo}: {len(lane)} commits already pending")
+
+            for sha in new:
+                self.seen[(repo, sha)] = True
+                lane.append(sha)
+            while len(self.seen) > SEEN_COMMITS_LIMIT:
+                self.seen.popitem(last=False)
+
+            if new and repo not in self.active:
+                self.active.add(repo)
+                self.pool.submit(self._run_lane, repo)
+            return len(new), len(shas) - len(new)
+
+    def _run_lane(self, repo):
+        while True:
+            with self.lock:
+                lane = self.lanes[repo]
+                if not lane:
+                    self.active.discard(repo)
+                    self.idle.notify_all()
+                    return
+                sha = lane.popleft()
+            try:
+                with metrics.start_run("webhook", repo=repo, commit=sha[:7]):
+                    self.process(repo, sha)
+            except Exception as e:
+                print(f"❌ {repo}@{sha[:7]} 처리 실패: {type(e).__name__}: {e}")
+                # 실패한 커밋은 웹훅을 다시 보내면 재처리되도록 기록에서 지움
+                with self.lock:
+                    self.seen.pop((repo, sha), None)
+
+    def pending(self):
+        with self.lock:
+            return {repo: len(lane) for repo, lane in self.lanes.items() if lane}
+
+    def wait_idle(self, timeout=None):
+        with self.lock:
+            return self.idle.wait_for(lambda: not self.active, timeout=timeout)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+
+
+def verify_signature(secret, body, signature_header):
+    """
+    X-Hub-Signature-256 헤더(sha256=<hex>)가 본문의 HMAC과 일치하는지 확인합니다.
+    """
+    if not secret or not signature_header:
+        return False
+    expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature_header)
+
+
+def push_commits(payload):
+    """
+    push 이벤트 payload에서 (owner/repo, 커밋 SHA 목록)을 꺼냅니다.
+    다른 브랜치에서 이미 push된 커밋(distinct=false)은 제외합니다.
+    """
+    repo = payload["repository"]["full_name"]
+    shas = [c["id"] for c in payload.get("commits") or [] if c.get("distinct", True)]
+    # 문자열이 아닌 값이 대기열에 들어가면 워커 스레드에서야 실패하므로 여기서 거름
+    if not isinstance(repo, str) or not all(isinstance(sha, str) for sha in shas):
+        raise ValueError("repository.full_name과 commits[].id는 문자열이어야 합니다.")
+    return repo, shas
+
+
+def process_commit(repo_full_name, sha):
+    """
+    커밋 하나를 diff 조회 → 학습 요약 → Notion 추가까지 처리합니다.
+    """
+    page_id = NOTION_PAGE_MAP.get(repo_full_name, NOTION_PAGE_ID)
+    if not page_id:
+        raise ValueError(f"{repo_full_name}에 연결된 Notion 페이지가 없습니다.")
+
+    owner, repo = repo_full_name.split("/", 1)
+    changes = message.get_commit_changes(owner, repo, sha, github_token=GITHUB_TOKEN)
+    if changes is None:
+        raise RuntimeError("GitHub에서 변경 내역을 가져오지 못했습니다.")
+    if not changes:
+        print(f"⏭️ {repo_full_name}@{sha[:7]}: diff가 없어 건너뜁니다.")
+        return
+
+    changes, filter_report = diff_filter.filter_changes(changes)
+    print(f"🧹 {repo_full_name}@{sha[:7]} {diff_filter.format_report(filter_report)}")
+
+    summary = message.summarize_changes(
+        changes,
+        repo=repo_full_name,
+        commit_sha=sha,
+        model=message.SUMMARY_MODEL,
+        system_prompt=message.SUMMARY_SYSTEM_PROMPT
+    )
+    notion_handler.send_to_notion(
+        notion_token=NOTION_TOKEN,
+        page_id=page_id,
+        title=f"Commit 요약 ({sha[:7]})",
+        summary_content=summary,
+        log=lambda *_: None
+    )
+    print(f"✅ {repo_full_name}@{sha[:7]} Notion 작성 완료")
+
+
+def make_handler(queue, secret):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def _reply(self, status, body, headers=None):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                self._reply(200, {"status": "ok", "pending": queue.pending()})
+            elif self.path == "/metrics":
+                # Prometheus 텍스트 형식의 단계별 누적 시간/토큰/재시도/전송량
+                data = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/webhook":
+                self._reply(404, {"error": "not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                length = -1
+            # 음수 길이로 read하면 연결이 닫힐 때까지 기다리므로 함께 거절
+            if length < 0:
+                self._reply(400, {"error": "invalid Content-Length"})
+                return
+            body = self.rfile.read(length)
+            if not verify_signature(secret, body, self.headers.get("X-Hub-Signature-256")):
+                self._reply(401, {"error": "invalid signature"})
+                return
+
+            event = self.headers.get("X-GitHub-Event", "")
+            if event == "ping":
+                self._reply(200, {"status": "pong"})
+                return
+            if event != "push":
+                self._reply(202, {"status": "ignored", "event": event})
+                return
+
+            try:
+                repo, shas = push_commits(json.loads(body))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                # JSON 객체가 아닌 본문([1, 2] 등)이나 필드 타입이 다른 payload도 400으로 거절
+                self._reply(400, {"error": f"invalid payload: {type(e).__name__}: {e}"})
+                return
+
+            try:
+                queued, duplicates = queue.submit(repo, shas)
+            except Backpressure as e:
+                self._reply(429, {"error": str(e)}, headers={"Retry-After": "60"})
+                return
+            self._reply(202, {"status": "queued", "repo": repo, "queued": queued, "duplicates": duplicates})
+
+        def log_message(self, format, *args):
+            print(f"🌐 {self.address_string()} {format % args}")
+
+    return WebhookHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GitHub push 웹훅 → Notion 학습 일지 서버")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if not WEBHOOK_SECRET:
+        raise SystemExit("❌ GITHUB_WEBHOOK_SECRET 환경 변수를 설정하세요.")
+
+    queue = JournalQueue(process_commit)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(queue, WEBHOOK_SECRET))
+    print(f"🚀 웹훅 서버 시작: http://{args.host}:{args.port}/webhook")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        queue.shutdown()
+
+
+if __name__ == "__main__":
+    main()